@@ -2,7 +2,7 @@ from . import views
 from .views import CategoryGraph
 
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import patch
 
 
 class ViewTestCase(TestCase):
@@ -10,8 +10,10 @@ class ViewTestCase(TestCase):
         """Installs a MagicMock object configured to return specific values,
         held in values_dict; this is a mapping from arguments to return values.
         """
-        views._get_category_names = MagicMock(
-            side_effect=lambda x: value_dict.get(x, set()))
+        patcher = patch('cat_checker.views._get_parent_categories',
+                        side_effect=lambda names: {n: value_dict.get(n, set()) for n in names})
+        self.mock_get_parent_categories = patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_get_categories_no_parents(self):
         self.install_mock({
@@ -80,7 +82,100 @@ class ViewTestCase(TestCase):
         self.assertEqual(views._get_categories('page', 3),
                          expected)
 
-        
+    def test_get_categories_fetches_one_batch_per_level(self):
+        self.install_mock({
+            'page': {'c1', 'c2'},
+            'c1': {'c3'},
+            'c2': {'c3'},
+        })
+
+        views._get_categories('page', 3)
+
+        self.assertEqual([args[0] for args, _ in self.mock_get_parent_categories.call_args_list],
+                         [{'page'}, {'c1', 'c2'}, {'c3'}])
+
+
+class GetParentCategoriesTest(TestCase):
+    def setUp(self):
+        patcher = patch('cat_checker.views.get_site')
+        self.mock_site = patcher.start()()
+        self.addCleanup(patcher.stop)
+
+
+    def test_get_parent_categories_batches_titles(self):
+        self.mock_site.api.return_value = {
+            'query': {'pages': {
+                '1': {'title': 'p1', 'categories': [{'title': 'Category:c1'}]},
+                '2': {'title': 'p2', 'categories': [{'title': 'Category:c1'},
+                                                    {'title': 'Category:c2'}]},
+                '-1': {'title': 'p3', 'missing': ''},
+            }}}
+
+        parents_of = views._get_parent_categories({'p1', 'p2', 'p3'})
+
+        self.mock_site.api.assert_called_once()
+        self.assertEqual(self.mock_site.api.call_args[1]['titles'], 'p1|p2|p3')
+        self.assertEqual(parents_of, {'p1': {'Category:c1'},
+                                      'p2': {'Category:c1', 'Category:c2'},
+                                      'p3': set()})
+
+
+    def test_get_parent_categories_follows_redirects(self):
+        self.mock_site.api.return_value = {
+            'query': {
+                'normalized': [{'from': 'p_1', 'to': 'P 1'}],
+                'redirects': [{'from': 'P 1', 'to': 'Target'}],
+                'pages': {
+                    '1': {'title': 'Target', 'categories': [{'title': 'Category:c1'}]},
+                }}}
+
+        parents_of = views._get_parent_categories({'p_1'})
+
+        self.assertEqual(parents_of, {'p_1': {'Category:c1'}})
+
+
+    def test_get_parent_categories_handles_continuation(self):
+        self.mock_site.api.side_effect = [
+            {'continue': {'clcontinue': '1|c2', 'continue': '||'},
+             'query': {'pages': {'1': {'title': 'p1', 'categories': [{'title': 'Category:c1'}]}}}},
+            {'query': {'pages': {'1': {'title': 'p1', 'categories': [{'title': 'Category:c2'}]}}}},
+        ]
+
+        parents_of = views._get_parent_categories({'p1'})
+
+        self.assertEqual(self.mock_site.api.call_count, 2)
+        self.assertEqual(self.mock_site.api.call_args[1]['clcontinue'], '1|c2')
+        self.assertEqual(parents_of, {'p1': {'Category:c1', 'Category:c2'}})
+
+
+class GetParentCategoriesCacheTest(TestCase):
+    @patch('cat_checker.views._fetch_parent_categories')
+    @patch('cat_checker.views.cache')
+    def test_get_parent_categories_only_fetches_uncached_titles(self, mock_cache, mock_fetch):
+        mock_cache.get_many.return_value = {'cat_checker.parent_categories.p1': {'Category:c1'}}
+        mock_fetch.return_value = {'p2': {'Category:c2'}}
+
+        parents_of = views._get_parent_categories({'p1', 'p2'})
+
+        mock_fetch.assert_called_once_with({'p2'})
+        mock_cache.set_many.assert_called_once_with({'cat_checker.parent_categories.p2': {'Category:c2'}},
+                                                    views.CATEGORY_CACHE_TIMEOUT)
+        self.assertEqual(parents_of, {'p1': {'Category:c1'},
+                                      'p2': {'Category:c2'}})
+
+
+    @patch('cat_checker.views._fetch_parent_categories')
+    @patch('cat_checker.views.cache')
+    def test_get_parent_categories_skips_fetch_when_all_cached(self, mock_cache, mock_fetch):
+        mock_cache.get_many.return_value = {'cat_checker.parent_categories.p1': {'Category:c1'}}
+
+        parents_of = views._get_parent_categories({'p1'})
+
+        mock_fetch.assert_not_called()
+        mock_cache.set_many.assert_not_called()
+        self.assertEqual(parents_of, {'p1': {'Category:c1'}})
+
+
 class CategoryGraphTest(TestCase):
     def test_construct_no_parents(self):
         g = CategoryGraph('c1')
@@ -134,3 +229,41 @@ class CategoryGraphTest(TestCase):
                                           CategoryGraph('c3b')
                                          })})
         self.assertEqual(g.dfs('c3a'), ['c1', 'c2', 'c3a'])
+
+    def test_flatten_with_shared_parents(self):
+        c3 = CategoryGraph('c3', {CategoryGraph('c4')})
+        g = CategoryGraph('c1', {CategoryGraph('c2a', {c3}),
+                                 CategoryGraph('c2b', {c3})})
+
+        self.assertEqual(g.flatten(), {'c1', 'c2a', 'c2b', 'c3', 'c4'})
+
+    def test_from_adjacency_shares_table(self):
+        parents_of = {'c1': {'c2'}, 'c2': {'c3'}}
+        g = CategoryGraph.from_adjacency('c1', parents_of)
+
+        self.assertEqual(g, CategoryGraph('c1', {CategoryGraph('c2', {CategoryGraph('c3')})}))
+        parent, = g.parents
+        self.assertIs(parent._parents_of, parents_of)
+
+    def test_cyclic_graph(self):
+        g = CategoryGraph.from_adjacency('c1', {'c1': {'c2'}, 'c2': {'c1', 'c3'}})
+
+        self.assertEqual(g.flatten(), {'c1', 'c2', 'c3'})
+        self.assertEqual(g.dfs('c3'), ['c1', 'c2', 'c3'])
+        self.assertIsNone(g.dfs('c4'))
+        self.assertEqual(g, CategoryGraph.from_adjacency('c1', {'c1': {'c2'}, 'c2': {'c1', 'c3'}}))
+
+    def test_eq_with_shared_table_does_not_walk_graph(self):
+        parents_of = {'c1': {'c2'}, 'c2': {'c3'}}
+        g1 = CategoryGraph.from_adjacency('c1', parents_of)
+        g2 = CategoryGraph.from_adjacency('c1', parents_of)
+
+        with patch.object(CategoryGraph, '_edges') as mock_edges:
+            self.assertEqual(g1, g2)
+            self.assertNotEqual(g1, CategoryGraph.from_adjacency('c2', parents_of))
+        mock_edges.assert_not_called()
+
+    def test_eq_with_different_parents(self):
+        self.assertNotEqual(CategoryGraph('c1', {CategoryGraph('c2')}),
+                            CategoryGraph('c1', {CategoryGraph('c3')}))
+        self.assertNotEqual(CategoryGraph('c1'), 'c1')
@@ -1,10 +1,23 @@
+from collections import defaultdict, deque
+
+from django.core.cache import cache
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseRedirect
-from mwclient import Site
+
+from more_itertools import chunked
+
+from wiki_interface.site import get_site
 
 from .forms import GetPageTitleForm
 
+
+# See https://www.mediawiki.org/wiki/API:Query#Specifying_pages
+MAX_TITLES = 50
+
+# Category membership changes slowly, so it's worth caching across requests.
+CATEGORY_CACHE_TIMEOUT = 300  # seconds
+
+
 def index(request):
     context = {}
     return render(request, 'cat_checker/index.dtl', context)
@@ -42,42 +55,131 @@ def _find_supercategories(page_title):
 
 def _get_categories(page_title, depth):
     """Return a set of CategoryGraphs for the given page.
-    The category graph will be navigated to the specified depth."""
-    category_names = _get_category_names(page_title)
-    categories = set()
-    for name in category_names:
-        g = CategoryGraph(name)
-        if depth > 1:
-            g.parents = _get_categories(name, depth-1)
-        categories.add(g)
-    return categories
-            
-
-def _get_category_names(page_title):
-    """Return a set of the names of the categories this page belongs to."""
-    ua = "CheckRefs/0.0 (User:RoySmith)"
-    site = Site('en.wikipedia.org', clients_useragent=ua)
-    page = site.pages[page_title].resolve_redirect()
-    return {cat.name for cat in page.categories()}
+    The category graph will be navigated to the specified depth.
+
+    The graph is explored breadth-first, so each level costs one API
+    request per MAX_TITLES categories instead of one per category.
+    All the returned CategoryGraphs share a single adjacency table.
+    """
+    parents_of = {}
+    frontier = {page_title}
+    for _ in range(depth):
+        frontier -= parents_of.keys()
+        if not frontier:
+            break
+        new_parents = _get_parent_categories(frontier)
+        parents_of.update(new_parents)
+        frontier = set().union(*new_parents.values())
+    return {CategoryGraph.from_adjacency(name, parents_of)
+            for name in parents_of.get(page_title, set())}
+
+
+def _get_parent_categories(page_titles):
+    """Return a dict mapping each of the given page titles to the set of
+    names of the categories it belongs to.  Redirects are followed.
+
+    Results are cached for CATEGORY_CACHE_TIMEOUT seconds; only the
+    titles which aren't in the cache are looked up on the wiki.
+    """
+    keys = {title: f'cat_checker.parent_categories.{title}' for title in page_titles}
+    cached = cache.get_many(keys.values())
+    parents_of = {title: cached[key] for title, key in keys.items() if key in cached}
+    missing = keys.keys() - parents_of.keys()
+    if missing:
+        fetched = _fetch_parent_categories(missing)
+        cache.set_many({keys[title]: parents for title, parents in fetched.items()},
+                       CATEGORY_CACHE_TIMEOUT)
+        parents_of.update(fetched)
+    return parents_of
+
+
+def _fetch_parent_categories(page_titles):
+    """Like _get_parent_categories(), but always goes to the wiki.
+
+    Titles are batched MAX_TITLES at a time, per
+    https://www.mediawiki.org/wiki/API:Etiquette.
+    """
+    site = get_site()
+    parents_of = {}
+    for chunk in chunked(sorted(page_titles), MAX_TITLES):
+        categories = defaultdict(set)
+        aliases = {}
+        kwargs = {'titles': '|'.join(chunk),
+                  'prop': 'categories',
+                  'cllimit': 'max',
+                  'redirects': 1}
+        while True:
+            result = site.api('query', **kwargs)
+            query = result['query']
+            for alias in query.get('normalized', []) + query.get('redirects', []):
+                aliases[alias['from']] = alias['to']
+            for page in query['pages'].values():
+                categories[page['title']].update(c['title'] for c in page.get('categories', []))
+            if 'continue' not in result:
+                break
+            kwargs.update(result['continue'])
+
+        for title in chunk:
+            resolved = title
+            seen = {resolved}
+            while resolved in aliases and aliases[resolved] not in seen:
+                resolved = aliases[resolved]
+                seen.add(resolved)
+            parents_of[title] = categories.get(resolved, set())
+    return parents_of
 
 
 class CategoryGraph:
+    """A view of one node in a category graph.
+
+    The graph itself is stored as an adjacency table: a dict mapping
+    each category name to the set of its parents' names.  Nodes
+    reached by several paths share the same table entry instead of
+    each path having its own copy of the subgraph.
+    """
     def __init__(self, name, parents=None):
         """Construct a CategoryGraph.  If parents is present, it should be
         an iterable over CategoryGraphs.
         """
         self.name = name
-        if parents:
-            self.parents = set(parents)
-        else:
-            self.parents = set()
+        self._parents_of = {}
+        parent_names = set()
+        for parent in parents or ():
+            for child_name, grandparent_names in parent._parents_of.items():
+                self._parents_of.setdefault(child_name, set()).update(grandparent_names)
+            parent_names.add(parent.name)
+        if parent_names:
+            self._parents_of[name] = parent_names
+
+    @classmethod
+    def from_adjacency(cls, name, parents_of):
+        """Return a CategoryGraph for the named node which uses (rather
+        than copies) parents_of as its adjacency table.
+        """
+        graph = cls.__new__(cls)
+        graph.name = name
+        graph._parents_of = parents_of
+        return graph
+
+    @property
+    def parents(self):
+        return {CategoryGraph.from_adjacency(name, self._parents_of)
+                for name in self._parents_of.get(self.name, set())}
 
     def __iter__(self):
         for parent in self.parents:
             yield parent
 
     def __eq__(self, other):
-        return self.name == other.name and self.parents == other.parents
+        if self is other:
+            return True
+        if not isinstance(other, CategoryGraph):
+            return NotImplemented
+        if self.name != other.name:
+            return False
+        # Views of the same table with the same name are necessarily
+        # the same graph; only independently built graphs need walking.
+        return self._parents_of is other._parents_of or self._edges() == other._edges()
 
     def __hash__(self):
         # Hashing just the name is rather minimal, but simple, and
@@ -85,17 +187,29 @@ class CategoryGraph:
         return hash(self.name)
 
     def __str__(self):
-        return('%s: %s' % (self.name, self.parents))
+        return('%s: %s' % (self.name, self._parents_of.get(self.name, set())))
 
     def __repr__(self):
-        return('%s: %s' % (self.name, self.parents))
+        return('%s: %s' % (self.name, self._parents_of.get(self.name, set())))
+
+    def _edges(self):
+        """Return the part of the adjacency table which is reachable
+        from this node."""
+        return {name: self._parents_of.get(name, set()) for name in self.flatten()}
 
     def flatten(self):
         """Return a set of all the category names in the graph.  This
-        includes the current node, and recursively all of its parents."""
+        includes the current node, and recursively all of its parents.
+
+        Each distinct name is expanded only once, so subgraphs shared
+        by several children aren't re-traversed."""
         names = {self.name}
-        for parent in self.parents:
-            names |= parent.flatten()
+        queue = deque([self.name])
+        while queue:
+            for parent_name in self._parents_of.get(queue.popleft(), set()):
+                if parent_name not in names:
+                    names.add(parent_name)
+                    queue.append(parent_name)
         return names
 
     def dfs(self, search_name, previous_path=None):
@@ -106,6 +220,8 @@ class CategoryGraph:
         if search_name == self.name:
             return path
         for g in self.parents:
+            if g.name in path:
+                continue
             found_path = g.dfs(search_name, path)
             if found_path:
                 return found_path
@@ -1,10 +1,8 @@
 from datetime import timedelta
 import logging
-import json
 
 from django.shortcuts import render
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.conf import settings
 
 from spi.spi_view import get_sock_names, SockType, SpiView
 
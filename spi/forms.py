@@ -1,3 +1,4 @@
+from functools import lru_cache
 import urllib.parse
 
 from django import forms
@@ -32,12 +33,24 @@ class CaseNameForm(forms.Form):
 class SockSelectForm(forms.Form):
     @staticmethod
     def build(sock_names):
+        return SockSelectForm.build_class(tuple(sock_names))()
+
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def build_class(sock_names):
+        """Return a SockSelectForm subclass with a field for each of
+        sock_names, which must be a tuple.
+
+        Classes are cached, so repeat views of the same case reuse
+        them.  This is safe because each form instance gets its own
+        deep copy of the class's fields.
+
+        """
         fields = {'sock_%s' % urllib.parse.quote(name):
                   forms.BooleanField(label=name, required=False)
                   for name in sock_names}
-        sub_class = type('DynamicSockSelectForm', (SockSelectForm,), fields)
-
-        return sub_class()
+        return type('DynamicSockSelectForm', (SockSelectForm,), fields)
 
 
 class UserInfoForm(forms.Form):
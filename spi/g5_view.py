@@ -6,7 +6,6 @@ import logging
 from django.shortcuts import render
 
 from spi.spi_view import get_sock_names, SpiView
-from wiki_interface import Wiki
 from wiki_interface.block_utils import UserBlockHistory
 
 
@@ -35,16 +34,21 @@ class G5View(SpiView):
 
         history = UserBlockHistory(self.wiki.user_blocks(case_name))
 
+        candidates = [contrib for contrib in self.wiki.user_contributions(sock_names, show="new")
+                      if history.is_blocked_at(contrib.timestamp)]
+        # Many of these will have been deleted already, so check them
+        # all in bulk before looking at any one page in detail.
+        existing = self.wiki.pages_exist(contrib.title for contrib in candidates)
+
         page_creations = []
-        for contrib in self.wiki.user_contributions(sock_names, show="new"):
-            if history.is_blocked_at(contrib.timestamp):
+        for contrib in candidates:
+            if existing[contrib.title]:
                 title = contrib.title
                 page = self.wiki.page(title)
-                if page.exists():
-                    page_creations.append(G5Summary(title,
-                                                    contrib.user_name,
-                                                    contrib.timestamp,
-                                                    self.g5_score(page)))
+                page_creations.append(G5Summary(title,
+                                                contrib.user_name,
+                                                contrib.timestamp,
+                                                self.g5_score(page)))
 
         context = {'case_name': case_name,
                    'page_creations': page_creations,
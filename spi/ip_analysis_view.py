@@ -1,6 +1,7 @@
-from collections import defaultdict
 from dataclasses import dataclass
+from itertools import groupby
 import logging
+from operator import itemgetter
 from typing import List
 
 from django.shortcuts import render
@@ -20,11 +21,10 @@ class IpSummary:
 
 class IpAnalysisView(SpiView):
     def get(self, request, case_name):
-        ip_data = defaultdict(list)
-        for i in CacheableSpiCase.get(self.wiki, case_name).ip_addresses:
-            ip_data[i.ip_address].append(i.date)
-        summaries = [IpSummary(ip, sorted(ip_data[ip])) for ip in ip_data]
-        summaries.sort()
+        ip_dates = sorted((i.ip_address, i.date)
+                          for i in CacheableSpiCase.get(self.wiki, case_name).ip_addresses)
+        summaries = [IpSummary(ip, [date for _, date in group])
+                     for ip, group in groupby(ip_dates, key=itemgetter(0))]
         context = {'case_name': case_name,
                    'ip_summaries': summaries}
         return render(request, 'spi/ip-analysis.html', context)
@@ -16,15 +16,24 @@ EDITOR_INTERACT_BASE = "https://tools.wmflabs.org/sigma/editorinteract.py"
 
 class SockSelectView(SpiView):
     def get(self, request, case_name):
-        user_infos = list(get_sock_names(self.wiki, case_name))
+        user_infos = get_sock_names(self.wiki, case_name)
         logger.debug(user_infos)
-        users_by_name = {user.username: user for user in user_infos}
-        names = list({user.username for user in user_infos if user.valid})
-        invalid_users = [user for user in user_infos if not user.valid]
-        dates = [users_by_name[name].date for name in names]
+        # Dicts preserve insertion order, so this dedups the valid users
+        # while keeping them in the order they appear in the case.
+        valid_users = {}
+        invalid_users = []
+        all_date_strings = set()
+        for user in user_infos:
+            if user.valid:
+                valid_users[user.username] = user
+            else:
+                invalid_users.append(user)
+            if user.date:
+                all_date_strings.add(user.date)
+        names = list(valid_users)
+        dates = [user.date for user in valid_users.values()]
         form = SockSelectForm.build(names)
 
-        all_date_strings = set(user.date for user in user_infos if user.date)
         keyed_dates = [(datetime.strptime(d, '%d %B %Y'), d) for d in all_date_strings]
 
         context = {'case_name': case_name,
@@ -40,22 +49,18 @@ class SockSelectView(SpiView):
             logger.debug("post: valid")
 
             if 'interaction-analyzer-button' in request.POST:
-                url = f'{EDITOR_INTERACT_BASE}?{self.get_encoded_users(request)}'
-                return redirect(url)
-
-            if 'timecard-button' in request.POST:
-                url = '%s?%s' % (reverse("spi-timecard", args=[case_name]),
-                                 self.get_encoded_users(request))
-                return redirect(url)
-
-            if 'timeline-button' in request.POST:
-                url = '%s?%s' % (reverse("spi-timeline", args=[case_name]),
-                                 self.get_encoded_users(request))
-                return redirect(url)
-
-            if 'pages-button' in request.POST:
-                url = '%s?%s' % (reverse("spi-pages", args=[case_name]),
-                                 self.get_encoded_users(request))
+                base_url = EDITOR_INTERACT_BASE
+            elif 'timecard-button' in request.POST:
+                base_url = reverse("spi-timecard", args=[case_name])
+            elif 'timeline-button' in request.POST:
+                base_url = reverse("spi-timeline", args=[case_name])
+            elif 'pages-button' in request.POST:
+                base_url = reverse("spi-pages", args=[case_name])
+            else:
+                base_url = None
+
+            if base_url:
+                url = f'{base_url}?{self.get_encoded_users(request)}'
                 return redirect(url)
 
             logger.error("Unknown button!")
@@ -73,8 +78,5 @@ class SockSelectView(SpiView):
         A string of the form "users=sock_1&users=sock_2....users=sock_n" is returned.
 
         """
-        selected_socks = [urllib.parse.unquote(f.replace('sock_', '', 1))
-                          for f in request.POST if f.startswith('sock_')]
-        query_items = [('users', sock) for sock in selected_socks]
-        params = urllib.parse.urlencode(query_items)
-        return params
+        return urllib.parse.urlencode([('users', urllib.parse.unquote(f[len('sock_'):]))
+                                       for f in request.POST if f.startswith('sock_')])
@@ -7,6 +7,7 @@ from itertools import chain
 import re
 
 from mwparserfromhell import parse
+from mwparserfromhell.nodes import Heading, Template
 from mwparserfromhell.wikicode import Wikicode
 
 from django.core.cache import cache
@@ -21,6 +22,45 @@ class InvalidIpV4Error(ValueError):
     pass
 
 
+# Template names, normalized by normalize_template_name().
+USER_TEMPLATE_NAMES = frozenset(['Checkuser', 'User', 'Checkip', 'CheckIP', 'SPIarchive notice'])
+IP_TEMPLATE_NAMES = frozenset(['Checkip', 'CheckIP'])
+SOCKLIST_TEMPLATE_NAMES = frozenset(['Sock list', 'Socklist'])
+
+
+# Old-style (level-5) day headers; see SpiCase.__init__().
+MAP_5_TO_3_PATTERN = re.compile(r"^=====<big>([a-zA-Z 0-9]*)</big>=====$", re.MULTILINE)
+
+
+def normalize_template_name(name):
+    """Normalize a template name (a Wikicode) the same way
+    Wikicode.matches() does: markup and surrounding whitespace are
+    stripped, underscores become spaces, and the first letter is
+    upper-cased.
+
+    """
+    text = name.strip_code().strip()
+    return (text[0].upper() + text[1:]).replace('_', ' ') if text else text
+
+
+def case_titles(master_name):
+    """Return the titles of the active case page and its archive, in
+    that order.
+
+    """
+    case_title = f'Wikipedia:Sockpuppet investigations/{master_name}'
+    return case_title, f'{case_title}/Archive'
+
+
+def parse_case_text(wikitext):
+    """Parse the wikitext of an SPI case page, mapping old-style (level-5)
+    headers to level-3 headers first; see SpiCase.__init__().
+
+    """
+    mapped_text = MAP_5_TO_3_PATTERN.sub(r'===\1===', wikitext)
+    return parse(mapped_text, skip_style_tags=True)
+
+
 @dataclass(frozen=True)
 class SpiDocumentBase:
     page_title: str
@@ -53,8 +93,7 @@ class CacheableSpiCase:
 
     @staticmethod
     def get(wiki, master_name):
-        titles = (f'Wikipedia:Sockpuppet investigations/{master_name}{suffix}' for suffix in ['', '/Archive'])
-        revisions = chain.from_iterable([wiki.page(t).revisions(count=1) for t in titles])
+        revisions = chain.from_iterable([wiki.page(t).revisions(count=1) for t in case_titles(master_name)])
         rev_id = max(r.rev_id for r in revisions)
         key = f'spi.CacheableSpiCase.{master_name}'
         case = cache.get(key, version=rev_id)
@@ -81,11 +120,11 @@ class SpiCase:
         The active page and any archives are used and combined.
 
         """
-        case_title = f'Wikipedia:Sockpuppet investigations/{master_name}'
-        case_doc = SpiSourceDocument(case_title, wiki.page(case_title).text())
+        case_title, archive_title = case_titles(master_name)
+        texts = wiki.page_texts([case_title, archive_title])
+        case_doc = SpiSourceDocument(case_title, texts[case_title])
         docs = [case_doc]
-        archive_title = f'{case_title}/Archive'
-        archive_text = wiki.page(archive_title).text()
+        archive_text = texts[archive_title]
         if archive_text:
             archive_doc = SpiSourceDocument(archive_title, archive_text)
             docs.append(archive_doc)
@@ -110,12 +149,8 @@ class SpiCase:
         has some history on why this uses such strange formatting.
 
         """
-        self.parsed_docs = []
-        map_5_to_3_pattern = re.compile(r"^=====<big>([a-zA-Z 0-9]*)</big>=====$", re.MULTILINE)
-        for s in sources:
-            mapped_text = map_5_to_3_pattern.sub(r'===\1===', s.wikitext)
-            parsed_text = parse(mapped_text, skip_style_tags=True)
-            self.parsed_docs.append(SpiParsedDocument(s.page_title, parsed_text))
+        self.parsed_docs = [SpiParsedDocument(s.page_title, parse_case_text(s.wikitext))
+                            for s in sources]
 
         master_names = set(doc.master_name() for doc in self.parsed_docs)
         if len(master_names) == 0:
@@ -123,13 +158,16 @@ class SpiCase:
         if len(master_names) > 1:
             raise ArchiveError("Multiple sockmaster names found: %s" % master_names)
         self.master_name = master_names.pop()
+        self._days = None
 
 
     def days(self):
         """Return an iterable of SpiCaseDays"""
-        for doc in self.parsed_docs:
-            for section in doc.wikicode.get_sections(levels=[3]):
-                yield SpiCaseDay(section, doc.page_title)
+        if self._days is None:
+            self._days = [SpiCaseDay(section, doc.page_title)
+                          for doc in self.parsed_docs
+                          for section in doc.wikicode.get_sections(levels=[3])]
+        return iter(self._days)
 
 
     def find_all_ips(self):
@@ -164,12 +202,36 @@ class SpiCaseDay:
     page_title: str
 
 
+    def __post_init__(self):
+        # Walk the wikicode once, collecting the level-3 headings and
+        # all the (named) templates, in document order.  The accessors
+        # below work from these lists instead of each re-filtering the
+        # whole section.
+        headings = []
+        templates = []
+        for node in self.wikicode.ifilter(forcetype=(Heading, Template)):
+            if isinstance(node, Template):
+                templates.append((normalize_template_name(node.name), node))
+            elif node.level == 3:
+                headings.append(node)
+        object.__setattr__(self, '_h3_headings', headings)
+        object.__setattr__(self, '_named_templates', templates)
+
+
+    def templates(self, names):
+        '''Return a list of the templates in this section whose normalized
+        names are in names, in document order.
+
+        '''
+        return [template for name, template in self._named_templates if name in names]
+
+
     def date(self):
         '''Return the date of this section as a string.  Leading and
         trailing whitespace is stripped from the sring.
 
         '''
-        headings = self.wikicode.filter_headings(matches=lambda h: h.level == 3)
+        headings = self._h3_headings
         h3_count = len(headings)
         if h3_count == 1:
             return headings[0].title.strip_code().strip()
@@ -187,9 +249,7 @@ class SpiCaseDay:
         explicit "1=" prefixes.
 
         '''
-        templates = self.wikicode.filter_templates(
-            matches=lambda n: n.name.matches(['sock list', 'socklist']))
-        for template in templates:
+        for template in self.templates(SOCKLIST_TEMPLATE_NAMES):
             for param in template.params:
                 name = str(param.name)
                 if name == '' or name.isdigit():
@@ -204,13 +264,7 @@ class SpiCaseDay:
 
         '''
         date = str(self.date())
-        templates = self.wikicode.filter_templates(
-            matches=lambda n: n.name.matches(['checkuser',
-                                              'user',
-                                              'checkip',
-                                              'checkIP',
-                                              'SPIarchive notice']))
-        for template in templates:
+        for template in self.templates(USER_TEMPLATE_NAMES):
             username = template.get('1').value.strip()
             yield SpiUserInfo(str(username), date)
         for name in self.parse_socklist():
@@ -243,9 +297,7 @@ class SpiCaseDay:
 
         '''
         date = str(self.date())
-        templates = self.wikicode.filter_templates(
-            matches=lambda n: n.name.matches(['checkip', 'checkIP']))
-        for template in templates:
+        for template in self.templates(IP_TEMPLATE_NAMES):
             ip_str = template.get('1').value
             try:
                 yield SpiIpInfo(str(ip_str), date, self.page_title)
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import IntEnum
 import logging
@@ -12,6 +13,8 @@ from wiki_interface import Wiki
 
 logger = logging.getLogger('spi.views')
 
+USER_TITLE_PATTERN = re.compile(r'User:(.*)$')
+
 
 class SockType(IntEnum):
     NONE = 0
@@ -39,6 +42,9 @@ def get_sock_names(wiki, master_name):
     Discovered usernames are checked for validity.  See
     Wiki.validate_username() for what it means to be valid.
 
+    The username validation and the two sock category listings are
+    independent API queries, so they're run concurrently.
+
     """
     key = f'views.get_sock_names.{master_name}'
     users = cache.get(key)
@@ -46,9 +52,17 @@ def get_sock_names(wiki, master_name):
         case = CacheableSpiCase.get(wiki, master_name)
         # Need to work out cache invalidation
         usernames = [user_info.username for user_info in case.users]
-        invalid_names = wiki.validate_usernames(usernames)
-        known_socks = _users_from_category(wiki, f'Wikipedia sockpuppets of {master_name}')
-        suspected_socks = _users_from_category(wiki, f'Suspected Wikipedia sockpuppets of {master_name}')
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            invalid_names_future = executor.submit(wiki.validate_usernames, usernames)
+            known_socks_future = executor.submit(_category_users,
+                                                 wiki,
+                                                 f'Wikipedia sockpuppets of {master_name}')
+            suspected_socks_future = executor.submit(_category_users,
+                                                     wiki,
+                                                     f'Suspected Wikipedia sockpuppets of {master_name}')
+        invalid_names = invalid_names_future.result()
+        known_socks = known_socks_future.result()
+        suspected_socks = suspected_socks_future.result()
         users = []
         for user_info in case.users:
             name = user_info.username
@@ -62,11 +76,24 @@ def get_sock_names(wiki, master_name):
     return users
 
 
-def _users_from_category(wiki, category_name):
+def _category_users(wiki, title):
+    """Return a list of the user names in the category.
+
+    Looking up the category queries the wiki, so this is done here,
+    on the worker thread, along with listing the members.
+
+    """
+    return _users_from_members(wiki.category(title).members())
+
+
+def _users_from_members(members):
+    """Return a list of the user names in an iterable over category
+    member titles.  Titles which aren't user pages are skipped.
+
+    """
     name_list = []
-    pattern = re.compile(r'User:(.*)$')
-    for member in wiki.category(category_name).members():
-        m = pattern.match(member)
+    for member in members:
+        m = USER_TITLE_PATTERN.match(member)
         if m:
             name_list.append(m[1])
     return name_list
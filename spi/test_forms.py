@@ -22,6 +22,13 @@ class SockSelectFormTest(TestCase):
         self.assertIsInstance(form, SockSelectForm)
         self.assertIsInstance(form.fields['sock_' + quoted_name], BooleanField)
 
+    def test_build_reuses_class_for_same_names(self):
+        form1 = SockSelectForm.build(['s0', 's1'])
+        form2 = SockSelectForm.build(['s0', 's1'])
+        self.assertIs(type(form1), type(form2))
+        self.assertIsNot(form1.fields['sock_s0'], form2.fields['sock_s0'])
+        self.assertIsNot(type(form1), type(SockSelectForm.build(['s1', 's0'])))
+
 
 class CaseNameFormTest(TestCase):
     # pylint: disable=invalid-name
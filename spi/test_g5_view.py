@@ -1,7 +1,10 @@
+from datetime import datetime, timezone
 from unittest.mock import patch
 
 from spi.test_spi_view import SpiViewTestCase
 from spi.spi_view import ValidatedUser
+from wiki_interface.block_utils import BlockEvent
+from wiki_interface.data import WikiContrib
 
 
 class G5ViewTest(SpiViewTestCase):
@@ -21,3 +24,22 @@ class G5ViewTest(SpiViewTestCase):
         response = self.client.get('/spi/g5/Fred')
 
         self.assertEqual(response.status_code, 200)
+
+
+    @patch('spi.g5_view.get_sock_names', autospec=True)
+    def test_only_existing_pages_are_fetched(self, mock_get_sock_names):
+        mock_get_sock_names.return_value = [ValidatedUser("User1", "20 June 2020", True)]
+        self.mock_wiki.user_blocks.return_value = [
+            BlockEvent('Fred', datetime(2020, 1, 1, tzinfo=timezone.utc), 1)]
+        self.mock_wiki.user_contributions.return_value = [
+            WikiContrib(3, datetime(2020, 3, 1, tzinfo=timezone.utc), 'User1', 0, 'P3', ''),
+            WikiContrib(2, datetime(2020, 2, 1, tzinfo=timezone.utc), 'User1', 0, 'P2', ''),
+        ]
+        self.mock_wiki.pages_exist.side_effect = lambda titles: {t: t == 'P2' for t in titles}
+        self.mock_wiki.page.return_value.revisions.return_value = []
+
+        self.client.get('/spi/g5/Fred')
+
+        self.mock_wiki.page.assert_called_once_with('P2')
+        context = self.mock_render.call_args[0][2]
+        self.assertEqual([c.title for c in context['page_creations']], ['P2'])
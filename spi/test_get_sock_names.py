@@ -82,9 +82,9 @@ class GetSockNamesTest(TestCase):
         wiki.category = MagicMock(Category)
         wiki.category.reset_mock()
         socks = get_sock_names(wiki, 'Fred')
-        self.assertEqual(wiki.category.call_args_list,
-                         [call('Wikipedia sockpuppets of Fred'),
-                          call('Suspected Wikipedia sockpuppets of Fred')])
+        self.assertCountEqual(wiki.category.call_args_list,
+                              [call('Wikipedia sockpuppets of Fred'),
+                               call('Suspected Wikipedia sockpuppets of Fred')])
 
 
     @patch('spi.spi_view.CacheableSpiCase')
@@ -99,14 +99,14 @@ class GetSockNamesTest(TestCase):
                                                                   [])
         wiki = NonCallableMock(Wiki)
         wiki.validate_usernames.return_value = {}
+        members = {'Wikipedia sockpuppets of Fred': ['User:sock1'],
+                   'Suspected Wikipedia sockpuppets of Fred': ['User:sock2']}
         wiki.category = MagicMock(Category)
-        wiki.category().members.side_effect = [['User:sock1'],
-                                               ['User:sock2']]
-        wiki.category.reset_mock()
+        wiki.category.side_effect = lambda title: MagicMock(Category, **{'members.return_value': members[title]})
         socks = get_sock_names(wiki, 'Fred')
-        self.assertEqual(wiki.category.call_args_list,
-                         [call('Wikipedia sockpuppets of Fred'),
-                          call('Suspected Wikipedia sockpuppets of Fred')])
+        self.assertCountEqual(wiki.category.call_args_list,
+                              [call('Wikipedia sockpuppets of Fred'),
+                               call('Suspected Wikipedia sockpuppets of Fred')])
         self.assertCountEqual(list(socks),
                               [ValidatedUser('sock1', '1 January 2020', True, SockType.KNOWN),
                                ValidatedUser('sock2', '1 January 2020', True, SockType.SUSPECTED),
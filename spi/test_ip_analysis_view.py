@@ -1,5 +1,8 @@
+from ipaddress import IPv4Address
 from unittest.mock import patch
 
+from spi.spi_utils import SpiIpInfo
+from spi.ip_analysis_view import IpSummary
 from spi.test_spi_view import SpiViewTestCase
 
 # pylint: disable=invalid-name
@@ -19,3 +22,20 @@ class IpAnalysisiewTest(SpiViewTestCase):
         response = self.client.get('/spi/ip-analysis/Ferd/')
 
         self.assertEqual(response.status_code, 200)
+
+
+    @patch('spi.ip_analysis_view.CacheableSpiCase', autospec=True)
+    def test_summaries_are_grouped_and_sorted(self, mock_CacheableSpiCase):
+        mock_CacheableSpiCase.get.return_value.ip_addresses = [
+            SpiIpInfo('1.2.3.4', '20200502', 'Ferd'),
+            SpiIpInfo('1.1.1.1', '20200601', 'Ferd'),
+            SpiIpInfo('1.2.3.4', '20200401', 'Ferd'),
+        ]
+
+        self.client.get('/spi/ip-analysis/Ferd/')
+
+        context = self.mock_render.call_args[0][2]
+        self.assertEqual(context['ip_summaries'], [
+            IpSummary(IPv4Address('1.1.1.1'), ['20200601']),
+            IpSummary(IPv4Address('1.2.3.4'), ['20200401', '20200502']),
+        ])
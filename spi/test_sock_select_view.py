@@ -67,6 +67,20 @@ class SockSelectViewTest(SpiViewTestCase):
         self.assertEqual(response.status_code, 200)
 
 
+    @patch('spi.sock_select_view.get_sock_names', autospec=True)
+    def test_users_are_in_case_order(self, mock_get_sock_names):
+        mock_get_sock_names.return_value = [ValidatedUser("User3", "20 June 2020", True),
+                                            ValidatedUser("User1", "20 June 2020", True),
+                                            ValidatedUser("User3", "20 June 2020", True),
+                                            ValidatedUser("User2", "21 June 2020", True)]
+
+        response = self.client.get('/spi/sock-select/Foo/')
+
+        context = response.context[0]
+        self.assertEqual([name for field, name, date in context['form_info']],
+                         ['User3', 'User1', 'User2'])
+
+
     @patch('spi.sock_select_view.get_sock_names', autospec=True)
     def test_context_includes_unique_dates(self, mock_get_sock_names):
         mock_get_sock_names.return_value = [ValidatedUser("User1", "20 June 2020", True),
@@ -149,3 +163,21 @@ class SockSelectViewTest(SpiViewTestCase):
         label = tree.cssselect('#sock-table > tbody > tr > td > label')[0]
         self.assertEqual(label.get('for'), 'id_sock_foo%26bar')
         self.assertEqual(label.text, 'foo&bar')
+
+
+    def test_post_redirects_to_selected_tool_with_selected_users(self):
+        response = self.client.post('/spi/sock-select/Foo/', {'sock_User1': 'on',
+                                                               'sock_foo%26bar': 'on',
+                                                               'timecard-button': ''})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, '/spi/timecard/Foo?users=User1&users=foo%26bar')
+
+
+    def test_post_redirects_to_interaction_analyzer(self):
+        response = self.client.post('/spi/sock-select/Foo/', {'sock_User1': 'on',
+                                                               'interaction-analyzer-button': ''})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url,
+                         'https://tools.wmflabs.org/sigma/editorinteract.py?users=User1')
@@ -8,7 +8,7 @@ import mwparserfromhell
 from wiki_interface import Wiki
 from wiki_interface.data import WikiContrib
 from spi.spi_utils import (SpiSourceDocument, SpiCase, SpiCaseDay, SpiIpInfo, SpiUserInfo, CacheableSpiCase,
-                           ArchiveError, get_current_case_names)
+                           ArchiveError, get_current_case_names, case_titles, parse_case_text)
 
 
 def make_code(text):
@@ -35,14 +35,14 @@ class CacheableSpiCaseTest(TestCase):
             [WikiContrib(2020_07_29, datetime(2020, 7, 29), 'user1', 4, 'Wikipedia:Sockpuppet investigations/Fred', '')],
             [WikiContrib(2020_07_28, datetime(2020, 7, 28), 'user1', 4, 'Wikipedia:Sockpuppet investigations/Fred/Archive', '')],
         ]
-        wiki.page().text.side_effect = [
+        wiki.page_texts.side_effect = lambda titles: dict(zip(titles, [
             dedent(
                 '''
                 {{SPIarchive notice|1=Fred}}
                 '''),
             dedent(
                 '''
-                ''')]
+                ''')]))
         cache.get.return_value = None
         wiki.page.reset_mock()
 
@@ -52,11 +52,11 @@ class CacheableSpiCaseTest(TestCase):
                                          2020_07_29,
                                          [SpiUserInfo('Fred', None)],
                                          [])
+        wiki.page_texts.assert_called_once_with(['Wikipedia:Sockpuppet investigations/Fred',
+                                                 'Wikipedia:Sockpuppet investigations/Fred/Archive'])
         self.assertEqual(wiki.page.call_args_list, [
             call('Wikipedia:Sockpuppet investigations/Fred'),
             call('Wikipedia:Sockpuppet investigations/Fred/Archive'),
-            call('Wikipedia:Sockpuppet investigations/Fred'),
-            call('Wikipedia:Sockpuppet investigations/Fred/Archive'),
         ])
         cache.get.assert_called_once_with('spi.CacheableSpiCase.Fred', version=2020_07_29)
         cache.set.assert_called_once_with('spi.CacheableSpiCase.Fred', expected_case, version=2020_07_29)
@@ -70,14 +70,14 @@ class CacheableSpiCaseTest(TestCase):
             [WikiContrib(2020_07_29, datetime(2020, 7, 29), 'user1', 4, 'Wikipedia:Sockpuppet investigations/Fred', '')],
             [WikiContrib(2020_07_28, datetime(2020, 7, 28), 'user1', 4, 'Wikipedia:Sockpuppet investigations/Fred/Archive', '')],
         ]
-        wiki.page().text.side_effect = [
+        wiki.page_texts.side_effect = lambda titles: dict(zip(titles, [
             dedent(
                 '''
                 {{SPIarchive notice|1=Fred}}
                 '''),
             dedent(
                 '''
-                ''')]
+                ''')]))
         cache.get.return_value = None
         wiki.page.reset_mock()
 
@@ -87,9 +87,9 @@ class CacheableSpiCaseTest(TestCase):
                                          2020_07_29,
                                          [SpiUserInfo('Fred', None)],
                                          [])
+        wiki.page_texts.assert_called_once_with(['Wikipedia:Sockpuppet investigations/Fred',
+                                                 'Wikipedia:Sockpuppet investigations/Fred/Archive'])
         self.assertEqual(wiki.page.call_args_list, [
-            call('Wikipedia:Sockpuppet investigations/Fred'),
-            call('Wikipedia:Sockpuppet investigations/Fred/Archive'),
             call('Wikipedia:Sockpuppet investigations/Fred'),
             call('Wikipedia:Sockpuppet investigations/Fred/Archive'),
             ])
@@ -105,14 +105,14 @@ class CacheableSpiCaseTest(TestCase):
             [WikiContrib(2020_07_29, datetime(2020, 7, 29), 'user1', 4, 'Wikipedia:Sockpuppet investigations/Fred', '')],
             [WikiContrib(2020_07_30, datetime(2020, 7, 30), 'user1', 4, 'Wikipedia:Sockpuppet investigations/Fred/Archive', '')],
         ]
-        wiki.page().text.side_effect = [
+        wiki.page_texts.side_effect = lambda titles: dict(zip(titles, [
             dedent(
                 '''
                 {{SPIarchive notice|1=Fred}}
                 '''),
             dedent(
                 '''
-                ''')]
+                ''')]))
         cache.get.return_value = None
         wiki.page.reset_mock()
 
@@ -122,9 +122,9 @@ class CacheableSpiCaseTest(TestCase):
                                          2020_07_30,
                                          [SpiUserInfo('Fred', None)],
                                          [])
+        wiki.page_texts.assert_called_once_with(['Wikipedia:Sockpuppet investigations/Fred',
+                                                 'Wikipedia:Sockpuppet investigations/Fred/Archive'])
         self.assertEqual(wiki.page.call_args_list, [
-            call('Wikipedia:Sockpuppet investigations/Fred'),
-            call('Wikipedia:Sockpuppet investigations/Fred/Archive'),
             call('Wikipedia:Sockpuppet investigations/Fred'),
             call('Wikipedia:Sockpuppet investigations/Fred/Archive'),
             ])
@@ -140,14 +140,14 @@ class CacheableSpiCaseTest(TestCase):
             [WikiContrib(2020_07_29, datetime(2020, 7, 29), 'user1', 4, 'Wikipedia:Sockpuppet investigations/Fred', '')],
             [],
         ]
-        wiki.page().text.side_effect = [
+        wiki.page_texts.side_effect = lambda titles: dict(zip(titles, [
             dedent(
                 '''
                 {{SPIarchive notice|1=Fred}}
                 '''),
             dedent(
                 '''
-                ''')]
+                ''')]))
         cache.get.return_value = None
         wiki.page.reset_mock()
 
@@ -157,11 +157,11 @@ class CacheableSpiCaseTest(TestCase):
                                          2020_07_29,
                                          [SpiUserInfo('Fred', None)],
                                          [])
+        wiki.page_texts.assert_called_once_with(['Wikipedia:Sockpuppet investigations/Fred',
+                                                 'Wikipedia:Sockpuppet investigations/Fred/Archive'])
         self.assertEqual(wiki.page.call_args_list, [
             call('Wikipedia:Sockpuppet investigations/Fred'),
             call('Wikipedia:Sockpuppet investigations/Fred/Archive'),
-            call('Wikipedia:Sockpuppet investigations/Fred'),
-            call('Wikipedia:Sockpuppet investigations/Fred/Archive'),
         ])
         cache.get.assert_called_once_with('spi.CacheableSpiCase.Fred', version=2020_07_29)
         cache.set.assert_called_once_with('spi.CacheableSpiCase.Fred', expected_case, version=2020_07_29)
@@ -190,25 +190,37 @@ class CacheableSpiCaseTest(TestCase):
         self.assertEqual(case.rev_id, 2020_07_29)
 
 
+class CaseTitlesTest(TestCase):
+    def test_case_titles(self):
+        self.assertEqual(case_titles('Fred'),
+                         ('Wikipedia:Sockpuppet investigations/Fred',
+                          'Wikipedia:Sockpuppet investigations/Fred/Archive'))
+
+
+class ParseCaseTextTest(TestCase):
+    def test_old_style_headers_are_mapped(self):
+        code = parse_case_text('=====<big>22 May 2011</big>=====\n')
+
+        self.assertEqual([h.level for h in code.filter_headings()], [3])
+
+
 class SpiCaseTest(TestCase):
     def test_for_master_with_no_data(self):
         wiki = NonCallableMock(Wiki)
-        wiki.page().text.side_effect = [
+        wiki.page_texts.side_effect = lambda titles: dict(zip(titles, [
             dedent(
                 '''
                 {{SPIarchive notice|1=Fred}}
                 '''),
             dedent(
                 '''
-                ''')]
+                ''')]))
         wiki.reset_mock()
 
         case = SpiCase.for_master(wiki, 'Fred')
 
-        self.assertEqual(wiki.page.call_args_list,
-                         [call('Wikipedia:Sockpuppet investigations/Fred'),
-                          call('Wikipedia:Sockpuppet investigations/Fred/Archive'),
-                         ])
+        wiki.page_texts.assert_called_once_with(['Wikipedia:Sockpuppet investigations/Fred',
+                                                 'Wikipedia:Sockpuppet investigations/Fred/Archive'])
         self.assertEqual(case.master_name, 'Fred')
         self.assertEqual(list(case.days()), [])
         self.assertEqual(list(case.find_all_ips()), [])
@@ -217,7 +229,7 @@ class SpiCaseTest(TestCase):
 
     def test_for_master_with_multiple_days(self):
         wiki = NonCallableMock(Wiki)
-        wiki.page().text.side_effect = [
+        wiki.page_texts.side_effect = lambda titles: dict(zip(titles, [
             dedent(
                 '''
                 {{SPIarchive notice|1=Fred}}
@@ -231,15 +243,13 @@ class SpiCaseTest(TestCase):
                 '''),
             dedent(
                 '''
-                ''')]
+                ''')]))
         wiki.reset_mock()
 
         case = SpiCase.for_master(wiki, 'Fred')
 
-        self.assertEqual(wiki.page.call_args_list,
-                         [call('Wikipedia:Sockpuppet investigations/Fred'),
-                          call('Wikipedia:Sockpuppet investigations/Fred/Archive'),
-                         ])
+        wiki.page_texts.assert_called_once_with(['Wikipedia:Sockpuppet investigations/Fred',
+                                                 'Wikipedia:Sockpuppet investigations/Fred/Archive'])
         self.assertEqual(case.master_name, 'Fred')
         self.assertEqual(list(case.find_all_ips()), [])
         self.assertEqual(list(case.find_all_users()),
@@ -253,7 +263,7 @@ class SpiCaseTest(TestCase):
 
     def test_for_master_with_multiple_days_and_mixed_new_and_old_style_headers(self):
         wiki = NonCallableMock(Wiki)
-        wiki.page().text.side_effect = [
+        wiki.page_texts.side_effect = lambda titles: dict(zip(titles, [
             dedent(
                 '''
                 {{SPIarchive notice|1=Fred}}
@@ -267,15 +277,13 @@ class SpiCaseTest(TestCase):
                 '''),
             dedent(
                 '''
-                ''')]
+                ''')]))
         wiki.reset_mock()
 
         case = SpiCase.for_master(wiki, 'Fred')
 
-        self.assertEqual(wiki.page.call_args_list,
-                         [call('Wikipedia:Sockpuppet investigations/Fred'),
-                          call('Wikipedia:Sockpuppet investigations/Fred/Archive'),
-                         ])
+        wiki.page_texts.assert_called_once_with(['Wikipedia:Sockpuppet investigations/Fred',
+                                                 'Wikipedia:Sockpuppet investigations/Fred/Archive'])
         self.assertEqual(case.master_name, 'Fred')
         self.assertEqual(list(case.find_all_ips()), [])
         self.assertEqual(list(case.find_all_users()),
@@ -506,6 +514,32 @@ class SpiCaseDayTest(TestCase):
         self.assertCountEqual(users, [SpiUserInfo('user1', '21 March 2019')])
 
 
+    def test_find_users_matches_template_names_loosely(self):
+        text = '''
+        ===21 March 2019===
+        {{ Checkuser |user1}}
+        {{SPIarchive_notice|user2}}
+        {{sock list|user3}}
+        '''
+        day = SpiCaseDay(make_code(text), 'title')
+        users = list(day.find_users())
+        self.assertCountEqual(users, [SpiUserInfo('user1', '21 March 2019'),
+                                      SpiUserInfo('user2', '21 March 2019'),
+                                      SpiUserInfo('user3', '21 March 2019')])
+
+
+    def test_templates_are_returned_in_document_order(self):
+        text = '''
+        ===21 March 2019===
+        {{user|user1}}
+        {{checkip|1.2.3.4}}
+        {{checkuser|user2}}
+        '''
+        day = SpiCaseDay(make_code(text), 'title')
+        names = [str(t.get('1').value) for t in day.templates({'User', 'Checkuser'})]
+        self.assertEqual(names, ['user1', 'user2'])
+
+
     def test_find_user_and_checkuser_instances(self):
         text = '''
         ===21 March 2019===
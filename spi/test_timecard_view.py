@@ -1,4 +1,4 @@
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 from spi.test_spi_view import SpiViewTestCase
 
@@ -21,3 +21,22 @@ class TimecardViewTest(SpiViewTestCase):
         response = self.client.get('/spi/timecard/Fred')
 
         self.assertEqual(response.status_code, 200)
+
+
+    @patch('spi.timecard_view._session', autospec=True)
+    def test_view_fetches_timecard_for_each_user(self, mock_session):
+        def mock_get(url, timeout):
+            response = MagicMock()
+            response.status_code = 200
+            hour = 1 if url.endswith('/User1') else 2
+            response.json.return_value = {'timecard': [{'hour': hour, 'day_of_week': 3, 'scale': 4},
+                                                       {'hour': hour, 'day_of_week': 3}]}
+            return response
+        mock_session.get.side_effect = mock_get
+
+        response = self.client.get('/spi/timecard/Fred?users=User1&users=User2')
+
+        self.assertEqual(response.status_code, 200)
+        context = self.mock_render.call_args[0][2]
+        self.assertEqual(context['data'], {'User1': [{'x': 1, 'y': 3, 'r': 4}],
+                                           'User2': [{'x': 2, 'y': 3, 'r': 4}]})
@@ -1,32 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import requests
+from requests.adapters import HTTPAdapter
 
 
 from django.shortcuts import render
 from django.views import View
-from wiki_interface import Wiki  #pylint: disable=unused-import
 
 
 logger = logging.getLogger('spi.views.timecard_view')
 
 TIMECARD_BASE = 'https://xtools.wmflabs.org/api/user/timecard/en.wikipedia.org'
+TIMECARD_TIMEOUT = 10  # seconds
+MAX_WORKERS = 8
+
+# Shared by all requests, so connections to xtools get reused.
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS))
 
 
 class TimecardView(View):
     def get(self, request, case_name):
         user_names = request.GET.getlist('users')
-        data = {}
-        for name in user_names:
-            response = requests.get('%s/%s' % (TIMECARD_BASE, name))
-            if response.status_code == requests.codes.ok: # pylint: disable=no-member
-                timecard = response.json()['timecard']
-                data[name] = [{'x': t['hour'], 'y': t['day_of_week'], 'r': t['scale']}
-                              for t in timecard
-                              if 'scale' in t]
-            else:
-                data[name] = []
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            data = dict(zip(user_names, executor.map(self.get_timecard, user_names)))
 
         context = {'case_name': case_name,
                    'users': user_names,
                    'data': data}
         return render(request, 'spi/timecard.html', context)
+
+
+    @staticmethod
+    def get_timecard(name):
+        """Fetch the timecard for one user from xtools.  Returns a list of
+        chart.js bubble chart points, or an empty list if the timecard
+        can't be retrieved.
+
+        """
+        try:
+            response = _session.get('%s/%s' % (TIMECARD_BASE, name), timeout=TIMECARD_TIMEOUT)
+        except requests.RequestException as ex:
+            logger.warning('timecard request for %s failed: %s', name, ex)
+            return []
+        if response.status_code != requests.codes.ok: # pylint: disable=no-member
+            return []
+        timecard = response.json()['timecard']
+        return [{'x': t['hour'], 'y': t['day_of_week'], 'r': t['scale']}
+                for t in timecard
+                if 'scale' in t]
@@ -7,41 +7,46 @@ from markupsafe import Markup, escape
 from tools_app.context_preprocessors import debug
 
 
+_PAGE_LINK = '<a href="https://en.wikipedia.org/wiki/{0}">{0}</a>'
+_DIFF_LINK = '<a href="http://en.wikipedia.org/wiki/Special:Diff/{0}">{1}</a>'
+_LOG_LINK = '<a href="http://en.wikipedia.org/w/index.php?title=Special:Log&logid={0}">{1}</a>'
+_USER_LINK = '<a href="https://en.wikipedia.org/wiki/User:{0}">{0}</a>'
+_SPI_LINK = '<a href="https://en.wikipedia.org/wiki/Wikipedia:Sockpuppet investigations/{0}">{0}</a>'
+_CONTRIBUTIONS_LINK = '<a href="https://en.wikipedia.org/wiki/Special:Contributions/{0}">contributions</a>'
+_DELETED_CONTRIBUTIONS_LINK = \
+    '<a href="https://en.wikipedia.org/wiki/Special:DeletedContributions/{0}">deleted_contributions</a>'
+
+# Event descriptions which correspond to log entries.
+_LOG_EVENTS = frozenset(['block', 'reblock', 'unblock', 'newusers', 'create', 'thanks', 'upload'])
+
+
 def page_link(title):
-    escaped = escape(title)
-    return Markup(f'<a href="https://en.wikipedia.org/wiki/{escaped}">{escaped}</a>')
+    return Markup(_PAGE_LINK.format(escape(title)))
 
 
 def event_link(event):
     escaped = escape(event.timestamp)
     if event.description == 'edit':
-        return Markup(f'<a href="http://en.wikipedia.org/wiki/Special:Diff/{event.id}">{event.timestamp}</a>')
-    if event.description in ('block', 'reblock', 'unblock', 'newusers', 'create', 'thanks', 'upload'):
-        return Markup(f'<a href="http://en.wikipedia.org/w/index.php?title=Special:Log&logid={event.id}">{event.timestamp}</a>')
-    else:
-        return Markup(f'{event.timestamp}')
+        return Markup(_DIFF_LINK.format(event.id, escaped))
+    if event.description in _LOG_EVENTS:
+        return Markup(_LOG_LINK.format(event.id, escaped))
+    return escaped
+
 
 def user_link(name):
-    escaped = escape(name)
-    return Markup(f'<a href="https://en.wikipedia.org/wiki/User:{name}">{name}</a>')
+    return Markup(_USER_LINK.format(escape(name)))
 
 
 def spi_link(case_name):
-    escaped = escape(case_name)
-    return Markup(
-        f'<a href="https://en.wikipedia.org/wiki/Wikipedia:Sockpuppet investigations/{escaped}">{escaped}</a>')
+    return Markup(_SPI_LINK.format(escape(case_name)))
 
 
 def contributions(user_name):
-    escaped = escape(user_name)
-    return Markup(
-        f'<a href="https://en.wikipedia.org/wiki/Special:Contributions/{escaped}">contributions</a>')
+    return Markup(_CONTRIBUTIONS_LINK.format(escape(user_name)))
 
 
 def deleted_contributions(user_name):
-    escaped = escape(user_name)
-    return Markup(
-        f'<a href="https://en.wikipedia.org/wiki/Special:DeletedContributions/{escaped}">deleted_contributions</a>')
+    return Markup(_DELETED_CONTRIBUTIONS_LINK.format(escape(user_name)))
 
 
 def environment(**options):
@@ -0,0 +1,32 @@
+from collections import namedtuple
+from unittest import TestCase
+
+from tools_app import jinja2
+
+
+Event = namedtuple('Event', 'timestamp id description')
+
+
+class LinkFiltersTest(TestCase):
+    def test_user_link_escapes_name(self):
+        self.assertEqual(jinja2.user_link('foo&bar'),
+                         '<a href="https://en.wikipedia.org/wiki/User:foo&amp;bar">foo&amp;bar</a>')
+
+
+    def test_page_link(self):
+        self.assertEqual(jinja2.page_link('Foo <bar>'),
+                         '<a href="https://en.wikipedia.org/wiki/Foo &lt;bar&gt;">Foo &lt;bar&gt;</a>')
+
+
+    def test_event_link_for_edit(self):
+        self.assertEqual(jinja2.event_link(Event('2020-07-30', 123, 'edit')),
+                         '<a href="http://en.wikipedia.org/wiki/Special:Diff/123">2020-07-30</a>')
+
+
+    def test_event_link_for_log_event(self):
+        self.assertEqual(jinja2.event_link(Event('2020-07-30', 123, 'block')),
+                         '<a href="http://en.wikipedia.org/w/index.php?title=Special:Log&logid=123">2020-07-30</a>')
+
+
+    def test_event_link_for_other_event(self):
+        self.assertEqual(jinja2.event_link(Event('2020-07-30', 123, 'whatever')), '2020-07-30')
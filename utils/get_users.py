@@ -3,8 +3,10 @@
 import argparse
 import re
 import mwclient
+from more_itertools import chunked
 
 SITE = 'en.wikipedia.org'
+MAX_USUSER = 50  # See https://www.mediawiki.org/wiki/API:Users
 
 def main():
     parser = argparse.ArgumentParser()
@@ -24,9 +26,10 @@ def main():
             if pattern.match(name):
                 usernames.append(name)
 
-    for result in site.users(usernames, prop='editcount|registration'):
-        # OrderedDict([('userid', 14010558), ('name', 'Dxhf1988'), ('editcount', 0), ('registration', '2011-02-16T02:09:31Z')])
-        print('*{{checkuser|%(name)s}} editcount=%(editcount)d registration=%(registration)s' % result)
+    for chunk in chunked(usernames, MAX_USUSER):
+        for result in site.users(chunk, prop='editcount|registration'):
+            # OrderedDict([('userid', 14010558), ('name', 'Dxhf1988'), ('editcount', 0), ('registration', '2011-02-16T02:09:31Z')])
+            print('*{{checkuser|%(name)s}} editcount=%(editcount)d registration=%(registration)s' % result)
 
 
 
@@ -1,10 +1,7 @@
+from bisect import bisect_right
 from typing import List
 from dataclasses import dataclass
-from datetime import datetime, timezone
-
-
-utc_min = datetime.replace(datetime.min, tzinfo=timezone.utc)
-utc_max = datetime.replace(datetime.max, tzinfo=timezone.utc)
+from datetime import datetime
 
 
 @dataclass(frozen=True)
@@ -55,23 +52,22 @@ class UserBlockHistory:
     """A representation of a user's block log.
 
     Constructor takes a iterable of BlockEvents and/or UnblockEvents
-    in arbitrary order.
+    in arbitrary order.  Raises ValueError if given any other kind of
+    event.
 
     """
     events: List[BaseBlockEvent]
 
     def __init__(self, unordered_events):
         self.events = sorted(unordered_events, key=lambda e: e.timestamp)
-
-
-    def __post_init__(self):
-        previous_timestamp = utc_min
+        # Parallel arrays, for binary searching in is_blocked_at().
+        self._timestamps = []
+        self._is_block = []
         for event in self.events:
             if not isinstance(event, (BlockEvent, UnblockEvent)):
                 raise ValueError(f'wrong type: {event}')
-            if event.timestamp <= previous_timestamp:
-                raise ValueError(f'event out of order: {event}')
-            previous_timestamp = event.timestamp
+            self._timestamps.append(event.timestamp)
+            self._is_block.append(isinstance(event, BlockEvent))
 
 
     def is_blocked_at(self, timestamp):
@@ -80,9 +76,5 @@ class UserBlockHistory:
         Returns True if they were, False otherwise.
 
         """
-        is_blocked = False
-        for event in self.events:
-            if event.timestamp > timestamp:
-                break
-            is_blocked = isinstance(event, BlockEvent)
-        return is_blocked
+        i = bisect_right(self._timestamps, timestamp)
+        return i > 0 and self._is_block[i - 1]
@@ -2,10 +2,42 @@
 
 
 import datetime
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import List
 
 
+def _add_slots(cls):
+    """Return a copy of the dataclass cls which uses __slots__ instead
+    of a per-instance __dict__.
+
+    This does what @dataclass(slots=True) does in Python 3.10+.  The
+    class has to be re-created, since __slots__ can't be added after
+    the fact and a slot can't share its name with a class attribute
+    holding the field's default.  Generated methods (including
+    __init__, which has the defaults baked in) are carried over
+    unchanged.  __getstate__ and __setstate__ are added so that frozen
+    instances can still be pickled (for the cache).
+
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    for name in field_names + ('__dict__', '__weakref__'):
+        cls_dict.pop(name, None)
+    cls_dict['__slots__'] = field_names
+
+    def __getstate__(self):
+        return [getattr(self, name) for name in field_names]
+
+    def __setstate__(self, state):
+        for name, value in zip(field_names, state):
+            object.__setattr__(self, name, value)
+
+    cls_dict['__getstate__'] = __getstate__
+    cls_dict['__setstate__'] = __setstate__
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+@_add_slots
 @dataclass(frozen=True, order=True)
 class WikiContrib:
     '''If the comment is hidden
@@ -24,6 +56,7 @@ class WikiContrib:
     tags: List[str] = field(default_factory=list)
 
 
+@_add_slots
 @dataclass(frozen=True)
 class LogEvent:
     log_id: int
@@ -0,0 +1,58 @@
+"""A shared, unauthenticated mwclient.Site.
+
+Constructing a Site is expensive; it opens a new HTTPS connection and
+makes a siteinfo API call before it can do anything useful.  Code
+which only needs anonymous read access can use get_site() to reuse a
+single Site (and thus its underlying requests.Session, with HTTP
+keep-alive) across calls.
+
+One Site is shared by all threads.  Once site_init() has run, a
+Site's own state (siteinfo, namespaces, and so on) is only read.  Each
+API call is a single request through its requests.Session, and the
+connections come from urllib3's pool, which is thread-safe.  The same
+holds for the per-request Sites Wiki creates, so their queries can be
+fanned out over worker threads too.
+
+Every Site, including the authenticated ones Wiki creates for each
+request, sends its requests through the one shared HTTP_ADAPTER.  It
+holds the connection pool, so open connections are reused across
+requests, and users, instead of each Site starting with a cold
+connection.  Credentials and cookies stay in each Site's own session.
+
+"""
+import threading
+
+from django.conf import settings
+from mwclient import Site
+from requests.adapters import HTTPAdapter
+
+
+MAX_WORKERS = 8  # Concurrent API requests per call, when batching.
+
+# Connections kept open to the wiki, across all threads and Sites.
+# One call can fan out to MAX_WORKERS requests (more when calls are
+# nested, as in get_sock_names()), and multi_user_blocks() uses the
+# default executor, which has at most 32 threads.  Past this many,
+# urllib3 discards connections instead of returning them to the pool.
+POOL_SIZE = 4 * MAX_WORKERS
+
+HTTP_ADAPTER = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+
+_lock = threading.Lock()
+_site = None
+
+
+def get_site():
+    """Return the shared anonymous mwclient.Site, creating it on first
+    use.
+
+    """
+    global _site  # pylint: disable=global-statement
+    with _lock:
+        if _site is None:
+            site = Site(settings.MEDIAWIKI_SITE_NAME,
+                        clients_useragent=settings.MEDIAWIKI_USER_AGENT,
+                        custom_headers={'Connection': 'keep-alive'})
+            site.connection.mount('https://', HTTP_ADAPTER)
+            _site = site
+        return _site
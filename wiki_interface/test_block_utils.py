@@ -2,6 +2,7 @@ from unittest import TestCase
 from datetime import datetime, timezone
 
 from wiki_interface.block_utils import BlockEvent, UnblockEvent, UserBlockHistory
+from wiki_interface.data import LogEvent
 
 
 # Note: In all of these tests, it is assumed that the last three
@@ -65,6 +66,12 @@ class TestUserBlockHistory(TestCase):
         self.assertIsInstance(history, UserBlockHistory)
 
 
+    def test_construct_with_wrong_event_type_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            UserBlockHistory([BlockEvent("fred", _dt(2019, 1, 1), 1000),
+                              LogEvent(1001, _dt(2019, 1, 2), "fred", "title", "delete", "delete", "")])
+
+
     def test_construct_with_valid_data(self):
         events = [BlockEvent("fred", _dt(2019, 1, 1), 1000),
                   UnblockEvent("fred", _dt(2019, 1, 2), 1000)]
@@ -92,3 +99,25 @@ class TestUserBlockHistory(TestCase):
                                     UnblockEvent("fred", _dt(2019, 1, 3), 1001)])
 
         self.assertTrue(history.is_blocked_at(_dt(2019, 1, 2)))
+
+
+    def test_is_blocked_at_before_first_event(self):
+        history = UserBlockHistory([BlockEvent("fred", _dt(2019, 1, 1), 1000)])
+
+        self.assertFalse(history.is_blocked_at(_dt(2018, 1, 1)))
+
+
+    def test_is_blocked_at_with_no_events(self):
+        history = UserBlockHistory([])
+
+        self.assertFalse(history.is_blocked_at(_dt(2019, 1, 1)))
+
+
+    def test_is_blocked_at_uses_event_at_exact_timestamp(self):
+        history = UserBlockHistory([UnblockEvent("fred", _dt(2019, 1, 3), 1001),
+                                    BlockEvent("fred", _dt(2019, 1, 1), 1000),
+                                    BlockEvent("fred", _dt(2019, 1, 5), 1002)])
+
+        self.assertTrue(history.is_blocked_at(_dt(2019, 1, 1)))
+        self.assertFalse(history.is_blocked_at(_dt(2019, 1, 3)))
+        self.assertTrue(history.is_blocked_at(_dt(2019, 1, 5)))
@@ -0,0 +1,50 @@
+from unittest import TestCase
+from datetime import datetime, timezone
+from dataclasses import FrozenInstanceError
+import pickle
+
+from wiki_interface.data import WikiContrib, LogEvent
+
+
+class WikiContribTest(TestCase):
+    def test_construct_with_defaults(self):
+        contrib = WikiContrib(1, datetime(2020, 1, 1, tzinfo=timezone.utc), 'fred', 0, 'Foo', 'c')
+
+        self.assertTrue(contrib.is_live)
+        self.assertEqual(contrib.tags, [])
+        self.assertIsNot(contrib.tags, WikiContrib(2, None, 'fred', 0, 'Foo', 'c').tags)
+
+
+    def test_uses_slots(self):
+        contrib = WikiContrib(1, datetime(2020, 1, 1, tzinfo=timezone.utc), 'fred', 0, 'Foo', 'c')
+
+        self.assertFalse(hasattr(contrib, '__dict__'))
+
+
+    def test_is_frozen(self):
+        contrib = WikiContrib(1, datetime(2020, 1, 1, tzinfo=timezone.utc), 'fred', 0, 'Foo', 'c')
+
+        with self.assertRaises(FrozenInstanceError):
+            contrib.title = 'Bar'
+
+
+    def test_is_ordered(self):
+        c1 = WikiContrib(1, datetime(2020, 1, 1, tzinfo=timezone.utc), 'fred', 0, 'Foo', 'c')
+        c2 = WikiContrib(2, datetime(2020, 1, 1, tzinfo=timezone.utc), 'fred', 0, 'Foo', 'c')
+
+        self.assertLess(c1, c2)
+
+
+    def test_pickle_round_trip(self):
+        contrib = WikiContrib(1, datetime(2020, 1, 1, tzinfo=timezone.utc), 'fred', 0, 'Foo', None,
+                              is_live=False, tags=['t1'])
+
+        self.assertEqual(pickle.loads(pickle.dumps(contrib)), contrib)
+
+
+class LogEventTest(TestCase):
+    def test_pickle_round_trip(self):
+        event = LogEvent(1, datetime(2020, 1, 1, tzinfo=timezone.utc), 'fred', 'Foo', 'block', 'block', '')
+
+        self.assertFalse(hasattr(event, '__dict__'))
+        self.assertEqual(pickle.loads(pickle.dumps(event)), event)
@@ -0,0 +1,53 @@
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.conf import settings
+
+from wiki_interface import site
+
+
+class GetSiteTest(TestCase):
+    # pylint: disable=invalid-name
+
+    def setUp(self):
+        site_patcher = patch('wiki_interface.site.Site')
+        self.MockSiteClass = site_patcher.start()
+        self.addCleanup(site_patcher.stop)
+        shared_site_patcher = patch.object(site, '_site', None)
+        shared_site_patcher.start()
+        self.addCleanup(shared_site_patcher.stop)
+
+
+    def test_get_site_creates_site_with_host_name_and_user_agent(self):
+        site.get_site()
+
+        self.MockSiteClass.assert_called_once()
+        args, kwargs = self.MockSiteClass.call_args
+        self.assertEqual(args, (settings.MEDIAWIKI_SITE_NAME,))
+        self.assertEqual(kwargs['clients_useragent'], settings.MEDIAWIKI_USER_AGENT)
+
+
+    def test_get_site_reuses_site(self):
+        site1 = site.get_site()
+        site2 = site.get_site()
+
+        self.assertIs(site1, site2)
+        self.MockSiteClass.assert_called_once()
+
+
+    def test_get_site_shares_site_with_other_threads(self):
+        sites = []
+        sites.append(site.get_site())
+        thread = threading.Thread(target=lambda: sites.append(site.get_site()))
+        thread.start()
+        thread.join()
+
+        self.assertIs(sites[0], sites[1])
+        self.MockSiteClass.assert_called_once()
+
+
+    def test_get_site_mounts_shared_adapter(self):
+        mock_site = site.get_site()
+
+        mock_site.connection.mount.assert_called_once_with('https://', site.HTTP_ADAPTER)
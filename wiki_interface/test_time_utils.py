@@ -1,10 +1,37 @@
 from unittest import TestCase
+from unittest.mock import patch
 import time
 import datetime
 
-from wiki_interface.time_utils import struct_to_datetime
+from wiki_interface.time_utils import struct_to_datetime, iso_to_datetime
 
 class StructToDatetimeTest(TestCase):
     def test_convert(self):
         self.assertEqual(struct_to_datetime(time.struct_time((2001, 1, 2, 0, 0, 0, 0, 0, 0))),
                          datetime.datetime(2001, 1, 2, tzinfo=datetime.timezone.utc))
+
+    def test_convert_ignores_local_timezone(self):
+        # Runs after patch.dict has put TZ back.
+        self.addCleanup(time.tzset)
+        with patch.dict('os.environ', {'TZ': 'America/New_York'}):
+            time.tzset()
+            result = struct_to_datetime(time.struct_time((2001, 1, 2, 3, 4, 5, 0, 0, 0)))
+        self.assertEqual(result, datetime.datetime(2001, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc))
+
+    def test_convert_tuple(self):
+        self.assertEqual(struct_to_datetime((2001, 1, 2, 3, 4, 5, 0, 0, 0)),
+                         datetime.datetime(2001, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc))
+
+
+class IsoToDatetimeTest(TestCase):
+    def test_mediawiki_format(self):
+        self.assertEqual(iso_to_datetime('2001-01-02T03:04:05Z'),
+                         datetime.datetime(2001, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc))
+
+    def test_other_format_falls_back_to_isoparse(self):
+        self.assertEqual(iso_to_datetime('2001-01-02T03:04:05.5+01:00'),
+                         datetime.datetime(2001, 1, 2, 2, 4, 5, 500000, tzinfo=datetime.timezone.utc))
+
+    def test_invalid_string_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            iso_to_datetime('2001-01-xxT03:04:05Z')
@@ -1,8 +1,7 @@
 from datetime import datetime, timezone
+import threading
 from unittest import TestCase
 from unittest.mock import call, patch, Mock, MagicMock
-from pprint import pprint
-from logging import getLogger
 
 
 from dateutil.parser import isoparse
@@ -15,8 +14,9 @@ import mwclient.util
 import mwclient.errors
 
 from wiki_interface.data import WikiContrib, LogEvent
-from wiki_interface.wiki import Wiki, Page, Category, MAX_UCUSER, CuLogEntry
+from wiki_interface.wiki import Wiki, Page, Category, MAX_UCUSER, MAX_USUSER, MAX_TITLES, CuLogEntry
 from wiki_interface.block_utils import BlockEvent, UnblockEvent
+from wiki_interface.site import HTTP_ADAPTER
 
 class ConstructorTest(TestCase):
     # pylint: disable=invalid-name
@@ -25,6 +25,7 @@ class ConstructorTest(TestCase):
         site_patcher = patch('wiki_interface.wiki.Site', autospec=True)
         self.MockSiteClass = site_patcher.start()
         self.MockSiteClass.return_value.namespaces = {}
+        self.MockSiteClass.return_value.connection = Mock()
         self.addCleanup(site_patcher.stop)
 
 
@@ -34,7 +35,8 @@ class ConstructorTest(TestCase):
         self.MockSiteClass.assert_called_once()
         args, kwargs = self.MockSiteClass.call_args
         self.assertEqual(args, (settings.MEDIAWIKI_SITE_NAME,))
-        self.assertEqual(kwargs, {'clients_useragent': settings.MEDIAWIKI_USER_AGENT})
+        self.assertEqual(kwargs, {'clients_useragent': settings.MEDIAWIKI_USER_AGENT,
+                                  'do_init': False})
 
 
     @patch('django.contrib.auth.get_user')
@@ -46,7 +48,8 @@ class ConstructorTest(TestCase):
         self.MockSiteClass.assert_called_once()
         args, kwargs = self.MockSiteClass.call_args
         self.assertEqual(args, (settings.MEDIAWIKI_SITE_NAME,))
-        self.assertEqual(kwargs, {'clients_useragent': settings.MEDIAWIKI_USER_AGENT})
+        self.assertEqual(kwargs, {'clients_useragent': settings.MEDIAWIKI_USER_AGENT,
+                                  'do_init': False})
 
 
     @patch('django.contrib.auth.get_user')
@@ -59,6 +62,7 @@ class ConstructorTest(TestCase):
         args, kwargs = self.MockSiteClass.call_args
         self.assertEqual(args, (settings.MEDIAWIKI_SITE_NAME,))
         self.assertEqual(set(kwargs.keys()), {'clients_useragent',
+                                              'do_init',
                                               'consumer_token',
                                               'consumer_secret',
                                               'access_token',
@@ -66,6 +70,36 @@ class ConstructorTest(TestCase):
         self.assertEqual(kwargs['clients_useragent'], settings.MEDIAWIKI_USER_AGENT)
 
 
+    def test_site_uses_shared_connection_pool_before_site_init(self):
+        mock_site = self.MockSiteClass.return_value
+        mock_site.site_init.side_effect = lambda: mock_site.connection.mount.assert_called_once_with(
+            'https://', HTTP_ADAPTER)
+
+        Wiki()
+
+        mock_site.site_init.assert_called_once_with()
+
+
+    def test_oauth_authorization_error_is_translated(self):
+        mock_site = self.MockSiteClass.return_value
+        mock_site.site_init.side_effect = mwclient.errors.APIError('mwoauth-invalid-authorization',
+                                                                   'blah',
+                                                                   None)
+
+        with self.assertRaises(mwclient.errors.OAuthAuthorizationError):
+            Wiki()
+
+
+    def test_private_wiki_error_is_ignored(self):
+        mock_site = self.MockSiteClass.return_value
+        mock_site.site_init.side_effect = mwclient.errors.APIError('readapidenied',
+                                                                   'blah',
+                                                                   None)
+
+        wiki = Wiki()
+
+        self.assertIs(wiki.site, mock_site)
+
 
 class WikiTestCase(TestCase):
     def setUp(self):
@@ -73,6 +107,7 @@ class WikiTestCase(TestCase):
         MockSiteClass = site_patcher.start()
         self.mock_site = MockSiteClass(settings.MEDIAWIKI_SITE_NAME)
         self.mock_site.namespaces = {}
+        self.mock_site.connection = Mock()
         self.mock_site.pages = MagicMock()
         self.addCleanup(site_patcher.stop)
 
@@ -408,6 +443,26 @@ class DeletedUserContributionsTest(WikiTestCase):
         self.assertEqual(items, expected_items)
 
 
+    @patch('wiki_interface.wiki.List')
+    def test_deleted_user_contributions_with_page_split_across_continuations(self, mock_List):
+        def page(title, *rev_ids):
+            return {'ns': 0,
+                    'title': title,
+                    'revisions': [{'revid': rev_id,
+                                   'timestamp': '2015-01-01T00:00:00Z',
+                                   'comment': '',
+                                   'tags': []}
+                                  for rev_id in rev_ids]}
+        pages = [page('p1', 5, 1), page('p2', 4), page('p1', 3, 6)]
+        mock_List().__iter__ = Mock(return_value=iter(pages))
+        mock_List.generate_kwargs.side_effect = mwclient.listing.List.generate_kwargs
+        wiki = Wiki()
+
+        items = list(wiki.deleted_user_contributions('fred'))
+
+        self.assertEqual([item.rev_id for item in items], [6, 5, 4, 3, 1])
+
+
     @patch('wiki_interface.wiki.List')
     def test_deleted_user_contributions_with_permission_denied_exception(self, mock_List):
         mock_List().__iter__.side_effect = mwclient.errors.APIError('permissiondenied',
@@ -574,6 +629,35 @@ class UserBlocksTest(WikiTestCase):
         mock_logger.error.assert_called_once()
 
 
+    @patch('wiki_interface.wiki.logger')
+    def test_user_blocks_ignores_expiry_on_unblock(self, mock_logger):
+        jan_1 = '2020-01-01T00:00:00Z'
+        self.mock_site.logevents.return_value = iter([
+            {'logid': 1,
+             'title': 'User:fred',
+             'timestamp': mwclient.util.parse_timestamp(jan_1),
+             'params': {'expiry': 'not a timestamp'},
+             'type': 'block',
+             'action': 'unblock'},
+        ])
+        wiki = Wiki()
+
+        user_blocks = wiki.user_blocks('fred')
+
+        self.assertEqual(user_blocks, [UnblockEvent('fred', isoparse(jan_1), 1)])
+        mock_logger.error.assert_not_called()
+
+
+    def test_user_blocks_is_cached(self):
+        self.mock_site.logevents.return_value = iter([])
+        wiki = Wiki()
+
+        wiki.user_blocks('fred')
+        wiki.user_blocks('fred')
+
+        self.mock_site.logevents.assert_called_once_with(title='User:fred', type='block')
+
+
 class MultiUserBlocksTest(WikiTestCase):
     #pylint: disable=invalid-name
 
@@ -715,6 +799,53 @@ class MultiUserBlocksTest(WikiTestCase):
         ])
 
 
+    def test_multi_user_blocks_with_block_and_unblock_events(self):
+        jan_1 = '2020-01-01T00:00:00Z'
+        feb_1 = '2020-02-01T00:00:00Z'
+        mar_1 = '2020-03-01T00:00:00Z'
+        logevents_data = {
+            'User:fred': [
+                {'logid': 2,
+                 'title': 'User:fred',
+                 'timestamp': mwclient.util.parse_timestamp(mar_1),
+                 'params': {},
+                 'type': 'block',
+                 'action': 'unblock'},
+            ],
+            'User:wilma': [
+                {'logid': 1,
+                 'title': 'User:wilma',
+                 'timestamp': mwclient.util.parse_timestamp(jan_1),
+                 'params': {'expiry': feb_1},
+                 'type': 'block',
+                 'action': 'block'},
+            ],
+        }
+        self.mock_site.logevents.side_effect = lambda title, type: logevents_data[title]
+        wiki = Wiki()
+
+        blocks = async_to_sync(wiki.multi_user_blocks)(['wilma', 'fred'])
+
+        self.assertEqual(blocks, [
+            UnblockEvent('fred', isoparse(mar_1), 2),
+            BlockEvent('wilma', isoparse(jan_1), 1, isoparse(feb_1)),
+        ])
+
+
+    def test_multi_user_blocks_runs_queries_off_the_calling_thread(self):
+        threads = []
+        def logevents(title, type):
+            threads.append(threading.current_thread())
+            return []
+        self.mock_site.logevents.side_effect = logevents
+        wiki = Wiki()
+
+        async_to_sync(wiki.multi_user_blocks)(['fred', 'wilma'])
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.current_thread(), threads)
+
+
 class UserLogsTest(WikiTestCase):
     # pylint: disable=invalid-name
 
@@ -830,6 +961,106 @@ class GetPageTest(WikiTestCase):
         self.assertIsInstance(page, Page)
 
 
+class PageTextsTest(WikiTestCase):
+    #pylint: disable=invalid-name
+
+    def test_page_texts_fetches_all_titles_in_one_request(self):
+        self.mock_site.api.return_value = {
+            'query': {'pages': [
+                {'title': 'P1', 'revisions': [{'slots': {'main': {'content': 'text 1'}}}]},
+                {'title': 'P2', 'revisions': [{'slots': {'main': {'content': 'text 2'}}}]},
+            ]}}
+        wiki = Wiki()
+
+        texts = wiki.page_texts(['P1', 'P2'])
+
+        self.mock_site.api.assert_called_once_with('query',
+                                                   titles='P1|P2',
+                                                   prop='revisions',
+                                                   rvprop='content',
+                                                   rvslots='main',
+                                                   formatversion=2)
+        self.assertEqual(texts, {'P1': 'text 1', 'P2': 'text 2'})
+
+
+    def test_page_texts_maps_missing_page_to_empty_string(self):
+        self.mock_site.api.return_value = {
+            'query': {'pages': [
+                {'title': 'P1', 'revisions': [{'slots': {'main': {'content': 'text 1'}}}]},
+                {'title': 'P2', 'missing': True},
+            ]}}
+        wiki = Wiki()
+
+        texts = wiki.page_texts(['P1', 'P2'])
+
+        self.assertEqual(texts, {'P1': 'text 1', 'P2': ''})
+
+
+    def test_page_texts_handles_normalized_titles(self):
+        self.mock_site.api.return_value = {
+            'query': {
+                'normalized': [{'from': 'p_1', 'to': 'P 1'}],
+                'pages': [
+                    {'title': 'P 1', 'revisions': [{'slots': {'main': {'content': 'text 1'}}}]},
+                ]}}
+        wiki = Wiki()
+
+        texts = wiki.page_texts(['p_1'])
+
+        self.assertEqual(texts, {'p_1': 'text 1'})
+
+
+    def test_page_texts_raises_value_error_with_pipe_in_title(self):
+        wiki = Wiki()
+
+        with self.assertRaises(ValueError):
+            wiki.page_texts(['P1', 'P|2'])
+
+        self.mock_site.api.assert_not_called()
+
+
+class PagesExistTest(WikiTestCase):
+    #pylint: disable=invalid-name
+
+    def test_pages_exist(self):
+        self.mock_site.api.return_value = {
+            'query': {
+                'normalized': [{'from': 'p_1', 'to': 'P 1'}],
+                'pages': [
+                    {'title': 'P 1', 'pageid': 1},
+                    {'title': 'P2', 'missing': True},
+                    {'title': 'P<3', 'invalid': True},
+                ]}}
+        wiki = Wiki()
+
+        exists = wiki.pages_exist(['p_1', 'P2', 'P<3'])
+
+        self.mock_site.api.assert_called_once_with('query', titles='p_1|P2|P<3', formatversion=2)
+        self.assertEqual(exists, {'p_1': True, 'P2': False, 'P<3': False})
+
+
+    def test_pages_exist_raises_value_error_with_pipe_in_title(self):
+        wiki = Wiki()
+
+        with self.assertRaises(ValueError):
+            wiki.pages_exist(['P1', 'P|2'])
+
+        self.mock_site.api.assert_not_called()
+
+
+    def test_pages_exist_chunks_and_skips_known_titles(self):
+        titles = [f'P{i}' for i in range(MAX_TITLES + 1)]
+        self.mock_site.api.side_effect = lambda action, titles, formatversion: {
+            'query': {'pages': [{'title': title, 'pageid': 1} for title in titles.split('|')]}}
+        wiki = Wiki()
+
+        wiki.pages_exist(titles)
+        exists = wiki.pages_exist(titles + titles)
+
+        self.assertEqual(self.mock_site.api.call_count, 2)
+        self.assertEqual(exists, {title: True for title in titles})
+
+
 class PageTest(WikiTestCase):
     #pylint: disable=invalid-name
 
@@ -842,6 +1073,13 @@ class PageTest(WikiTestCase):
         self.assertIsNotNone(page.mw_page)
 
 
+    def test_uses_slots(self):
+        wiki = Wiki()
+
+        self.assertFalse(hasattr(Page(wiki, "my page"), '__dict__'))
+        self.assertFalse(hasattr(Category(wiki, "my category"), '__dict__'))
+
+
     def test_exists_true(self):
         self.mock_site.pages.__getitem__().exists = True
         wiki = Wiki()
@@ -929,14 +1167,39 @@ class CategoryTest(WikiTestCase):
         wiki.site.pages.__getitem__.assert_called_once_with('Category:my category')
 
 
-    def test_members_returns_empty_iterable_for_empty_category(self):
+    @patch('wiki_interface.wiki.List')
+    def test_members_returns_empty_iterable_for_empty_category(self, mock_List):
+        mock_List.return_value = iter([])
+        mock_List.generate_kwargs.side_effect = mwclient.listing.List.generate_kwargs
         wiki = Wiki()
-        self.mock_site.pages.__getitem__().return_value = Category(wiki, 'Foo')
-        self.mock_site.pages.__getitem__().members.return_value = []
         cat = Category(wiki, 'Foo')
         self.assertEqual(list(cat.members()), [])
 
 
+    @patch('wiki_interface.wiki.List')
+    def test_members_returns_titles(self, mock_List):
+        mock_List.return_value = iter([{'ns': 2, 'title': 'User:Foo'},
+                                       {'ns': 2, 'title': 'User:Bar'}])
+        mock_List.generate_kwargs.side_effect = mwclient.listing.List.generate_kwargs
+        self.mock_site.pages.__getitem__.return_value.name = 'Category:Foo'
+        wiki = Wiki()
+        cat = Category(wiki, 'Foo')
+
+        self.assertEqual(list(cat.members()), ['User:Foo', 'User:Bar'])
+        mock_List.assert_called_once_with(self.mock_site, 'categorymembers', 'cm',
+                                          cmtitle='Category:Foo', cmprop='title')
+
+
+class PageExistsTest(WikiTestCase):
+    def test_page_exists_is_cached(self):
+        self.mock_site.pages.__getitem__.return_value.exists = True
+        wiki = Wiki()
+
+        self.assertTrue(wiki.page_exists('Foo'))
+        self.assertTrue(wiki.page_exists('Foo'))
+        self.mock_site.pages.__getitem__.assert_called_once_with('Foo')
+
+
 class IsValidUsernameTest(WikiTestCase):
     #pylint: disable=invalid-name
 
@@ -967,6 +1230,70 @@ class IsValidUsernameTest(WikiTestCase):
         self.mock_site.usercontributions.assert_called_once_with('foo', limit=1)
 
 
+    def test_result_is_cached(self):
+        self.mock_site.usercontributions.side_effect = mwclient.errors.APIError('baduser',
+                                                                             'blah',
+                                                                             None)
+        wiki = Wiki()
+
+        self.assertFalse(wiki.is_valid_username('foo'))
+        self.assertFalse(wiki.is_valid_username('foo'))
+        self.mock_site.usercontributions.assert_called_once_with('foo', limit=1)
+
+
+class GetRegistrationTimesTest(WikiTestCase):
+    #pylint: disable=invalid-name
+
+    def test_get_registration_time(self):
+        self.mock_site.users.return_value = iter([{'name': 'Foo',
+                                                   'registration': '2020-07-30T00:00:00Z'}])
+        wiki = Wiki()
+
+        self.assertEqual(wiki.get_registration_time('foo'), '2020-07-30T00:00:00Z')
+        self.mock_site.users.assert_called_once_with(users=['foo'], prop='registration')
+
+
+    def test_get_registration_times_maps_missing_registration_to_none(self):
+        self.mock_site.users.return_value = iter([{'name': 'User1',
+                                                   'registration': '2020-07-30T00:00:00Z'},
+                                                  {'name': 'User2',
+                                                   'missing': ''}])
+        wiki = Wiki()
+
+        self.assertEqual(wiki.get_registration_times(['User1', 'User2']),
+                         {'User1': '2020-07-30T00:00:00Z',
+                          'User2': None})
+
+
+    def test_get_registration_times_with_too_many_names(self):
+        names = [f'User{i}' for i in range(MAX_USUSER + 1)]
+        self.mock_site.users.side_effect = lambda users, prop: iter([{'name': name,
+                                                                      'registration': '2020-07-30T00:00:00Z'}
+                                                                     for name in users])
+        wiki = Wiki()
+
+        registrations = wiki.get_registration_times(names)
+
+        self.assertEqual(self.mock_site.users.call_count, 2)
+        self.assertEqual(set(registrations), set(names))
+
+
+    def test_get_registration_times_only_looks_up_new_names(self):
+        self.mock_site.users.side_effect = lambda users, prop: iter([{'name': name,
+                                                                      'registration': '2020-07-30T00:00:00Z'}
+                                                                     for name in users])
+        wiki = Wiki()
+
+        wiki.get_registration_time('User1')
+        registrations = wiki.get_registration_times(['User1', 'User2', 'User2'])
+
+        self.assertEqual(self.mock_site.users.call_args_list,
+                         [call(users=['User1'], prop='registration'),
+                          call(users=['User2'], prop='registration')])
+        self.assertEqual(registrations, {'User1': '2020-07-30T00:00:00Z',
+                                         'User2': '2020-07-30T00:00:00Z'})
+
+
 class ValidateUsernamesTest(WikiTestCase):
     #pylint: disable=invalid-name
 
@@ -1041,6 +1368,70 @@ class ValidateUsernamesTest(WikiTestCase):
 
 
 
+    @patch.object(Wiki, 'normalize_username', wraps=Wiki.normalize_username)
+    def test_validate_usernames_only_normalizes_when_names_are_missing(self, mock_normalize_username):
+        self.mock_site.api.return_value = {
+            "query": {
+                "users": [{'name': 'User1', 'userid': 1},
+                          {'name': 'user:2', 'invalid': ''}]
+                }
+            }
+        wiki = Wiki()
+
+        result = wiki.validate_usernames(['user1', 'user:2', 'user1'])
+
+        self.assertEqual(result, {'user:2'})
+        mock_normalize_username.assert_not_called()
+
+
+    def test_validate_usernames_with_non_string_raises_type_error(self):
+        wiki = Wiki()
+        for bad_name in [None, 1]:
+            with self.subTest(bad_name=bad_name):
+                with self.assertRaises(TypeError):
+                    wiki.validate_usernames(['foo', bad_name])
+        self.mock_site.api.assert_not_called()
+
+
+    def test_validate_usernames_with_pipe_raises_value_error(self):
+        wiki = Wiki()
+        with self.assertRaises(ValueError):
+            wiki.validate_usernames(['foo', 'bar|baz'])
+        self.mock_site.api.assert_not_called()
+
+
+    def test_validate_usernames_with_multiple_chunks(self):
+        names = [f'user{i}' for i in range(MAX_USUSER + 1)]
+        def api(action, list, ususers):
+            users = ususers.split('|')
+            return {'query': {'users': [{'name': name.capitalize(), 'missing': ''}
+                                        if name in ('user1', f'user{MAX_USUSER}') else
+                                        {'name': name.capitalize(), 'userid': 1}
+                                        for name in users]}}
+        self.mock_site.api.side_effect = api
+        wiki = Wiki()
+
+        result = wiki.validate_usernames(names)
+
+        self.assertEqual(self.mock_site.api.call_count, 2)
+        self.assertEqual(result, {'user1', f'user{MAX_USUSER}'})
+
+
+
+class IsIpAddressTest(TestCase):
+    def test_ipv4(self):
+        self.assertTrue(Wiki._is_ip_address('1.2.3.4'))
+
+    def test_ipv6(self):
+        self.assertTrue(Wiki._is_ip_address('fe80::4438:87ff:feb6:f684'))
+        self.assertTrue(Wiki._is_ip_address('::1'))
+
+    def test_not_an_address(self):
+        for name in ['', 'Fred', '1Fred', '1.2.3.0/24', 'User:Fred', '1.2.3.256']:
+            with self.subTest(name=name):
+                self.assertFalse(Wiki._is_ip_address(name))
+
+
 class NormalizeUsernameTest(WikiTestCase):
     def test_empty_string(self):
         self.assertEqual(Wiki.normalize_username(''), '')
@@ -1065,6 +1456,9 @@ class NormalizeUsernameTest(WikiTestCase):
     def test_mixed_spaces_and_underscores(self):
         self.assertEqual(Wiki.normalize_username(' Foo__Bar Baz_'), 'Foo Bar Baz')
 
+    def test_tabs_newlines_and_unicode_spaces(self):
+        self.assertEqual(Wiki.normalize_username('\tfoo\n_bar\u00a0\u2003baz\r'), 'Foo bar baz')
+
 
 
 class CuLogEntryTest(WikiTestCase):
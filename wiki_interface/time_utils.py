@@ -1,8 +1,31 @@
 from datetime import datetime, timezone
-from time import mktime
+
+from dateutil.parser import isoparse
 
 def struct_to_datetime(struct_time):
-    """Convert a struct_time to a UTC aware datetime.
+    """Convert a struct_time (or an equivalent tuple), as returned by
+    mwclient, to a UTC aware datetime.
+
+    mwclient's struct_times are already in UTC, so the fields are
+    used as-is.  This avoids a round trip through mktime(), which
+    would also interpret them in the local timezone.
+
+    """
+    return datetime(*struct_time[:6], tzinfo=timezone.utc)
+
+
+def iso_to_datetime(iso_string):
+    """Convert an ISO 8601 timestamp string, as returned by the
+    MediaWiki API, to a UTC aware datetime.
+
+    The API always uses the fixed YYYY-MM-DDTHH:MM:SSZ form, which is
+    parsed by slicing.  Anything else falls back to the much slower,
+    general purpose, dateutil isoparse().
 
     """
-    return datetime.fromtimestamp(mktime(struct_time), tz=timezone.utc)
+    s = iso_string
+    if len(s) == 20 and s[10] == 'T' and s[19] == 'Z':
+        return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                        int(s[11:13]), int(s[14:16]), int(s[17:19]),
+                        tzinfo=timezone.utc)
+    return isoparse(s)
@@ -10,12 +10,14 @@ mwclient.Site directly.
 
 """
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from ipaddress import IPv4Address, IPv6Address, AddressValueError
-from itertools import islice
+from functools import partial
+from ipaddress import ip_address
+from itertools import chain, islice
+from operator import attrgetter, itemgetter
 import asyncio
-import heapq
 import re
 
 import django.contrib.auth
@@ -24,14 +26,13 @@ from asgiref.sync import sync_to_async
 
 from mwclient import Site
 from mwclient.listing import List
-from mwclient.errors import APIError
-import mwclient
-from dateutil.parser import isoparse
-from more_itertools import always_iterable, chunked, consume
+from mwclient.errors import APIError, OAuthAuthorizationError
+from more_itertools import always_iterable, chunked
 
 from wiki_interface.data import WikiContrib, LogEvent
+from wiki_interface.site import HTTP_ADAPTER, MAX_WORKERS
 from wiki_interface.block_utils import BlockEvent, UnblockEvent
-from wiki_interface.time_utils import struct_to_datetime
+from wiki_interface.time_utils import struct_to_datetime, iso_to_datetime
 
 
 logger = logging.getLogger('wiki_interface')
@@ -39,6 +40,15 @@ logger = logging.getLogger('wiki_interface')
 
 MAX_UCUSER = 50  # See https://www.mediawiki.org/wiki/API:Usercontribs.
 MAX_USUSER = 50  # See https://www.mediawiki.org/wiki/API:Users
+MAX_TITLES = 50  # See https://www.mediawiki.org/wiki/API:Query
+
+# Runs of whitespace and/or underscores; see Wiki.normalize_username().
+SPACES_PATTERN = re.compile(r'[\s_]+')
+
+# The always-present fields of raw API results, fetched in one go.
+CONTRIB_FIELDS = itemgetter('revid', 'timestamp', 'user', 'ns', 'title', 'tags')
+LOG_EVENT_FIELDS = itemgetter('logid', 'timestamp', 'user', 'type')
+REVISION_FIELDS = itemgetter('revid', 'timestamp')
 
 
 @dataclass(frozen=True)
@@ -59,10 +69,29 @@ class CuLogEntry:
         return CuLogEntry(api_entry.get('checkuser'),
                           api_entry.get('reason'),
                           api_entry.get('target'),
-                          isoparse(api_entry['timestamp']),
+                          iso_to_datetime(api_entry['timestamp']),
                           api_entry.get('type'))
 
 
+def _block_event(user_name, timestamp, id, params, is_reblock=False):
+    mw_expiry = params.get('expiry')
+    expiry = mw_expiry and iso_to_datetime(mw_expiry)
+    return BlockEvent(user_name, timestamp, id, expiry, is_reblock=is_reblock)
+
+
+def _unblock_event(user_name, timestamp, id, params):
+    return UnblockEvent(user_name, timestamp, id)
+
+
+# Maps a block log action to a function which builds the
+# corresponding event from the user name, timestamp, log id, and raw
+# params.  Only (re)blocks have an expiry to parse.
+BLOCK_EVENT_BUILDERS = {
+    'block': _block_event,
+    'reblock': partial(_block_event, is_reblock=True),
+    'unblock': _unblock_event,
+}
+
 
 class Wiki:
     """High-level wiki interface.
@@ -81,6 +110,12 @@ class Wiki:
         self.namespace_values = {v: k for k, v in self.namespaces.items()}
         self.reqeust = request
         self.request_id = request and request.META.get('HTTP_X_REQUEST_ID')
+        # Per-request memos for the single-item lookups, which tend to
+        # be repeated for the same pages and users.
+        self._page_exists_cache = {}
+        self._registration_cache = {}
+        self._valid_username_cache = {}
+        self._user_blocks_cache = {}
 
 
     @staticmethod
@@ -104,15 +139,35 @@ class Wiki:
                 'access_secret': access_token['oauth_token_secret']
             }
 
-        return Site(settings.MEDIAWIKI_SITE_NAME,
+        # Hold off on site_init() until the shared connection pool is
+        # mounted, so even the initial siteinfo query can reuse an
+        # open connection.
+        site = Site(settings.MEDIAWIKI_SITE_NAME,
                     clients_useragent=settings.MEDIAWIKI_USER_AGENT,
+                    do_init=False,
                     **auth_info)
+        site.connection.mount('https://', HTTP_ADAPTER)
+        try:
+            site.site_init()
+        except APIError as ex:
+            # Same as mwclient does when it calls site_init() itself.
+            # Copied from mwclient 0.10.0's Site.__init__(); recheck
+            # this when upgrading mwclient.
+            if ex.args[0] == 'mwoauth-invalid-authorization':
+                raise OAuthAuthorizationError(site, ex.code, ex.info)
+            # Private wiki; mwclient leaves site_init() until after login.
+            if ex.args[0] not in {'unknown_action', 'readapidenied'}:
+                raise
+        return site
 
 
     def page_exists(self, title):
         """Return True if the page exists, False otherwise."""
 
-        return self.site.pages[title].exists
+        exists = self._page_exists_cache.get(title)
+        if exists is None:
+            exists = self._page_exists_cache[title] = self.site.pages[title].exists
+        return exists
 
 
     def get_registration_time(self, user):
@@ -121,12 +176,28 @@ class Wiki:
         If the registration time can't be determined, returns None.
 
         """
-        registrations = self.site.users(users=[user], prop=['registration'])
-        userinfo = registrations.next()
-        try:
-            return userinfo['registration']
-        except KeyError:
-            return None
+        return self.get_registration_times([user])[user]
+
+
+    def get_registration_times(self, user_names):
+        """Return a dict mapping each of the user names to that user's
+        registration time as a string.
+
+        Users are looked up MAX_USUSER at a time.  If a user's
+        registration time can't be determined, it maps to None.
+        Users which have already been looked up by this Wiki aren't
+        looked up again.
+
+        """
+        user_names = list(user_names)
+        registrations = self._registration_cache
+        new_names = [name for name in dict.fromkeys(user_names) if name not in registrations]
+        for chunk in chunked(new_names, MAX_USUSER):
+            normalized_registrations = {userinfo['name']: userinfo.get('registration')
+                                        for userinfo in self.site.users(users=chunk, prop='registration')}
+            for name in chunk:
+                registrations[name] = normalized_registrations.get(self.normalize_username(name))
+        return {name: registrations[name] for name in user_names}
 
 
     def user_contributions(self, user_name_or_names, show='', end=None):
@@ -144,25 +215,22 @@ class Wiki:
         Returns an iterable over WikiContribs.
 
         """
-        all_names = []
-        for name in always_iterable(user_name_or_names):
-            str_name = str(name)
-            if '|' in str_name:
-                raise ValueError(f'"|" in user name: {str_name}')
-            all_names.append(str_name)
+        all_names = [str(name) for name in always_iterable(user_name_or_names)]
+        self._check_for_pipes(all_names)
 
         props = 'ids|title|timestamp|comment|flags|tags'
         for chunk in chunked(all_names, MAX_UCUSER):
             for contrib in self.site.usercontributions('|'.join(chunk), show=show, prop=props, end=end):
                 logger.debug("contrib = %s", contrib)
-                yield WikiContrib(contrib['revid'],
-                                  struct_to_datetime(contrib['timestamp']),
-                                  contrib['user'],
-                                  contrib['ns'],
-                                  contrib['title'],
+                rev_id, timestamp, user, namespace, title, tags = CONTRIB_FIELDS(contrib)
+                yield WikiContrib(rev_id,
+                                  struct_to_datetime(timestamp),
+                                  user,
+                                  namespace,
+                                  title,
                                   contrib['comment'] if 'commenthidden' not in contrib else None,
                                   True,
-                                  contrib['tags'])
+                                  tags)
 
 
     def deleted_user_contributions(self, user_name):
@@ -173,11 +241,10 @@ class Wiki:
         If the mwclient connection is not authenticated to a
         user with admin rights, returns an empty iterable.
 
-        The current implementation stores and sorts all the
-        WikiContribs internally.  It may be possible to avoid this
-        in-memory storage using a merge sort, but it would be messy,
-        and probably not worth the effort, as the expected number of
-        deleted contributions is small.
+        The WikiContribs are returned in reverse order, as a list.
+        They can't be streamed: the API groups revisions by page, and
+        a page may show up again in a later continuation, so the
+        newest revision isn't known until everything has been fetched.
 
         """
         kwargs = dict(List.generate_kwargs('adr',
@@ -196,14 +263,17 @@ class Wiki:
             for page in listing:
                 title = page['title']
                 namespace = page['ns']
-                for revision in page['revisions']:
-                    rev_id = revision['revid']
-                    logger.debug("deleted revision = %s", revision)
-                    timestamp = isoparse(revision['timestamp'])
-                    comment = revision['comment'] if 'commenthidden' not in revision else None
-                    tags = revision['tags']
-                    contribs.append(WikiContrib(
-                        rev_id, timestamp, user_name, namespace, title, comment, is_live=False, tags=tags))
+                revisions = page['revisions']
+                logger.debug("%d deleted revisions of %s", len(revisions), title)
+                contribs.extend(WikiContrib(revision['revid'],
+                                            iso_to_datetime(revision['timestamp']),
+                                            user_name,
+                                            namespace,
+                                            title,
+                                            revision['comment'] if 'commenthidden' not in revision else None,
+                                            False,
+                                            revision['tags'])
+                                for revision in revisions)
         except APIError as ex:
             if ex.args[0] == 'permissiondenied':
                 logger.warning('Permission denied in wiki_interface.deleted_user_contributions()')
@@ -227,23 +297,35 @@ class Wiki:
 
         Events are returned in reverse chronological order
         (i.e. most recent first).
+
+        Results are remembered for the life of this Wiki, and the
+        same list is returned each time, so callers must not modify
+        it.
+        """
+        events = self._user_blocks_cache.get(user_name)
+        if events is None:
+            blocks = self.site.logevents(title=f'User:{user_name}', type="block")
+            events = self._user_blocks_cache[user_name] = self._parse_block_events(blocks, user_name)
+        return events
+
+
+    @staticmethod
+    def _parse_block_events(blocks, user_name):
+        """Turn an iterable over raw logevents API results for the block
+        log of user_name into a list of BlockEvents and UnblockEvents,
+        in the same order.
+
         """
-        blocks = self.site.logevents(title=f'User:{user_name}', type="block")
         events = []
         for block in blocks:
-            action = block['action']
-            timestamp = struct_to_datetime(block['timestamp'])
-            id = block['logid']
-            mw_expiry = block['params'].get('expiry')
-            expiry = mw_expiry and isoparse(mw_expiry)
-            if action == 'block':
-                events.append(BlockEvent(user_name, timestamp, id, expiry))
-            elif action == 'reblock':
-                events.append(BlockEvent(user_name, timestamp, id, expiry, is_reblock=True))
-            elif action == 'unblock':
-                events.append(UnblockEvent(user_name, timestamp, id))
-            else:
+            make_event = BLOCK_EVENT_BUILDERS.get(block['action'])
+            if make_event is None:
                 logger.error('Ignoring block due to unknown block action in %s', block)
+                continue
+            events.append(make_event(user_name,
+                                     struct_to_datetime(block['timestamp']),
+                                     block['logid'],
+                                     block['params']))
         return events
 
 
@@ -257,10 +339,16 @@ class Wiki:
         recent first), with the events for the various users
         intermingled.
 
+        The per-user queries are run concurrently in the default
+        executor.  They don't touch anything thread-sensitive, so
+        there's no reason to serialize them all on the main thread,
+        which is what sync_to_async() does by default.
+
         """
-        tasks = [sync_to_async(self.user_blocks)(name) for name in user_names]
+        user_blocks = sync_to_async(self.user_blocks, thread_sensitive=False)
+        tasks = [user_blocks(name) for name in user_names]
         blocks = await asyncio.gather(*tasks)
-        return list(heapq.merge(*blocks, reverse=True))
+        return sorted(chain.from_iterable(blocks), key=attrgetter('timestamp'), reverse=True)
 
 
     def user_log_events(self, user_name):
@@ -272,18 +360,77 @@ class Wiki:
 
         """
         for event in self.site.logevents(user=user_name):
-            yield LogEvent(event['logid'],
-                           struct_to_datetime(event['timestamp']),
-                           event['user'],
-                           event['title'] if 'title' in event else None,
-                           event['type'],
-                           event['action'] if 'action' in event else None,
+            log_id, timestamp, user, log_type = LOG_EVENT_FIELDS(event)
+            yield LogEvent(log_id,
+                           struct_to_datetime(timestamp),
+                           user,
+                           event.get('title'),
+                           log_type,
+                           event.get('action'),
                            event['comment'] if 'commenthidden' not in event else None)
 
     def page(self, title):
         return Page(self, title)
 
 
+    def pages_exist(self, titles):
+        """Check whether several pages exist at once.
+
+        Returns a dict mapping each title to True if the page exists,
+        False otherwise.  The pages are looked up MAX_TITLES at a
+        time, and, as with page_exists(), titles which have already
+        been looked up by this Wiki aren't looked up again.
+
+        Raises ValueError if any title contains a '|'.
+
+        """
+        titles = list(titles)
+        self._check_for_pipes(titles, 'title')
+        known = self._page_exists_cache
+        new_titles = [title for title in dict.fromkeys(titles) if title not in known]
+        for chunk in chunked(new_titles, MAX_TITLES):
+            result = self.site.api('query', titles='|'.join(chunk), formatversion=2)
+            query = result['query']
+            normalized_titles = {n['from']: n['to'] for n in query.get('normalized', [])}
+            existing_titles = {page['title'] for page in query['pages']
+                               if not page.get('missing') and not page.get('invalid')}
+            for title in chunk:
+                known[title] = normalized_titles.get(title, title) in existing_titles
+        return {title: known[title] for title in titles}
+
+
+    def page_texts(self, titles):
+        """Get the current wikitext of several pages at once.
+
+        Returns a dict mapping each title to the text of that page.
+        As with Page.text(), a missing page maps to the empty string.
+
+        The pages are fetched MAX_TITLES at a time, so a handful of
+        pages costs a single API request.
+
+        Raises ValueError if any title contains a '|'.
+
+        """
+        titles = list(titles)
+        self._check_for_pipes(titles, 'title')
+        texts = {}
+        for chunk in chunked(titles, MAX_TITLES):
+            result = self.site.api('query',
+                                   titles='|'.join(chunk),
+                                   prop='revisions',
+                                   rvprop='content',
+                                   rvslots='main',
+                                   formatversion=2)
+            query = result['query']
+            normalized_titles = {n['from']: n['to'] for n in query.get('normalized', [])}
+            texts_by_title = {page['title']: page['revisions'][0]['slots']['main']['content']
+                              for page in query['pages']
+                              if page.get('revisions')}
+            for title in chunk:
+                texts[title] = texts_by_title.get(normalized_titles.get(title, title), '')
+        return texts
+
+
     def category(self, title):
         return Category(self, title)
 
@@ -295,15 +442,21 @@ class Wiki:
         valid but not exist on a particular wiki.
 
         Returns True for valid usernames, False for invalid usernames.
+        Results are remembered for the life of this Wiki; errors
+        other than 'baduser' are not.
 
         """
-        try:
-            consume(islice(self.site.usercontributions(user_name, limit=1), 0, 1))
-            return True
-        except APIError as ex:
-            if ex.code == 'baduser':
-                return False
-            raise
+        valid = self._valid_username_cache.get(user_name)
+        if valid is None:
+            try:
+                next(iter(self.site.usercontributions(user_name, limit=1)), None)
+                valid = True
+            except APIError as ex:
+                if ex.code != 'baduser':
+                    raise
+                valid = False
+            self._valid_username_cache[user_name] = valid
+        return valid
 
 
 
@@ -317,12 +470,8 @@ class Wiki:
         are mapped to spaces.
 
         """
-        underscores = re.sub(r'\s', '_', name)
-        single_space = re.sub(r'_+', ' ', underscores)
-        trimmed = single_space.strip()
-        first = trimmed[0:1]
-        rest = trimmed[1:]
-        return first.upper() + rest
+        trimmed = SPACES_PATTERN.sub(' ', name).strip()
+        return trimmed[:1].upper() + trimmed[1:]
 
 
     def validate_usernames(self, input_names):
@@ -340,50 +489,80 @@ class Wiki:
         username, but not '1.2.3.0/24'.
 
         """
-        user_names = []
+        input_names = list(input_names)
+        logger.debug('input_names = %s', input_names)
         for name in input_names:
-            logger.debug('name = %s', name)
             if not isinstance(name, str):
                 raise TypeError(f'{repr(name)} is not a string')
-            if '|' in name:
-                raise ValueError(f'"|" in user name: {name}')
-            if not self._is_ip_address(name.strip()):
-                user_names.append(name)
+        self._check_for_pipes(input_names)
+        user_names = [name for name in input_names if not self._is_ip_address(name.strip())]
+
+        # The chunks are independent queries, so when there's more
+        # than one, issue them concurrently.
+        input_chunks = list(chunked(user_names, MAX_USUSER))
+        if len(input_chunks) > 1:
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                output_chunks = list(executor.map(self._query_users, input_chunks))
+        else:
+            output_chunks = [self._query_users(chunk) for chunk in input_chunks]
 
         invalid_names = set()
         normalized_missing_names = set()
-        for input_chunk in chunked(user_names, MAX_USUSER):
-            api_result = self.site.api('query', list='users', ususers='|'.join(input_chunk))
-            output_chunk = api_result['query']['users']
+        for output_chunk in output_chunks:
             for output_data in output_chunk:
                 if 'invalid' in output_data:
                     invalid_names.add(output_data['name'])
                 elif 'missing' in output_data:
                     normalized_missing_names.add(output_data['name'])
 
-        result = set()
-        for name in user_names:
-            if self.normalize_username(name) in normalized_missing_names:
-                result.add(name)
-            elif name in invalid_names:
-                result.add(name)
-
+        # The API reports invalid names as given, but missing ones
+        # normalized.  Usually nothing is missing, in which case
+        # there's no need to normalize anything.
+        result = invalid_names.intersection(user_names)
+        if normalized_missing_names:
+            result.update(name for name in dict.fromkeys(user_names)
+                          if self.normalize_username(name) in normalized_missing_names)
         return result
 
 
+    @staticmethod
+    def _check_for_pipes(names, kind='user name'):
+        """Raise ValueError if any of the names contains a '|'.
+
+        The API splits multi-valued parameters on '|', so such a name
+        would silently be taken as several.
+
+        """
+        bad_name = next((name for name in names if '|' in name), None)
+        if bad_name is not None:
+            raise ValueError(f'"|" in {kind}: {bad_name}')
+
+
+    def _query_users(self, user_names):
+        """Return the raw API:Users results for a list of at most
+        MAX_USUSER user names.
+
+        """
+        api_result = self.site.api('query', list='users', ususers='|'.join(user_names))
+        return api_result['query']['users']
+
+
     @staticmethod
     def _is_ip_address(str):
         """Return a truthy value if the string is a valid IP (v4 or v6)
         address, False otherwise.
 
+        Most usernames aren't IP addresses, so the cheap check for a
+        leading digit (IPv4) or a colon (IPv6) weeds them out before
+        paying for an exception from ip_address().
+
         """
+        if not (str[:1].isdigit() or ':' in str):
+            return False
         try:
-            return IPv4Address(str)
-        except AddressValueError:
-            try:
-                return IPv6Address(str)
-            except AddressValueError:
-               return False
+            return ip_address(str)
+        except ValueError:
+            return False
 
 
     def get_cu_log(self, user=None, target=None, from_ts=None, to_ts=None):
@@ -413,10 +592,8 @@ class Wiki:
 
 
 
-@dataclass
 class Page:
-    wiki: Wiki
-    mw_page: mwclient.page.Page
+    __slots__ = ('wiki', 'mw_page')
 
 
     def __init__(self, wiki, title):
@@ -433,10 +610,11 @@ class Page:
         if count is not None:
             revisions = islice(revisions, count)
         for rev in revisions:
+            rev_id, timestamp = REVISION_FIELDS(rev)
             comment = rev['comment'] if 'commenthidden' not in rev else None
             user = rev['user'] if 'userhidden' not in rev else None
-            yield WikiContrib(rev['revid'],
-                              struct_to_datetime(rev['timestamp']),
+            yield WikiContrib(rev_id,
+                              struct_to_datetime(timestamp),
                               user,
                               self.mw_page.namespace,
                               self.mw_page.name,
@@ -450,8 +628,9 @@ class Page:
         return self.mw_page.name
 
 
-@dataclass
 class Category(Page):
+    __slots__ = ()
+
     def __init__(self, wiki, title):
         super().__init__(wiki, f'Category:{title}')
 
@@ -460,6 +639,11 @@ class Category(Page):
         """Returns a iterable over the page titles (as strings) which are
         members of the category.
 
+        This uses a plain categorymembers list, asking only for the
+        titles, rather than mwclient's Category.members(), which
+        builds a Page (with page info) for every member.
+
         """
-        for page in self.mw_page.members():
-            yield page.name
+        kwargs = dict(List.generate_kwargs('cm', title=self.mw_page.name, prop='title'))
+        for member in List(self.wiki.site, 'categorymembers', 'cm', **kwargs):
+            yield member['title']